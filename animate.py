@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+# animate.py, animation of gear2 planetary assemblies.  The sun turns
+# and the planets turn in mesh with it, with the carrier (the planets'
+# centers) held still, or, with a ring gear of s+2p teeth held still,
+# with the carrier turning too.  Each distinct gear is written once,
+# as an OpenSCAD module built from the memoized gearSubtree, and each
+# frame is only a list of module calls, placed by transforms computed
+# for all frames at once.  Output is either one .scad file driven by
+# OpenSCAD's $t (View > Animate, in OpenSCAD), or a sequence of frame
+# files, base-0000.scad, base-0001.scad, ...
+
+# Usage: ./animate.py [-f frames] [-t turns | --loop] [--ring]
+#            [-o base] [a g h m n p s]
+# -t sets how many turns the sun makes over the animation; --loop
+# picks the fewest turns after which every gear is back where it
+# started, so the animation repeats seamlessly.
+
+import argparse, contextlib, io, time
+from fractions import Fraction
+from math import pi, gcd
+import numpy as np
+
+#---------------------------------------------
+def rates(ap, ringFixed=False):
+    '''Return turns of (carrier, planets) per turn of the sun, as
+    Fractions, for GearAssembly ap.  With ringFixed, a ring gear of
+    s+2p teeth is held still; else the carrier is.  '''
+    s, p = ap.s, ap.p
+    wc = Fraction(s, 2*s + 2*p) if ringFixed else Fraction(0)
+    return wc, wc - (1 - wc)*Fraction(s, p)
+
+def loopTurns(ap, ringFixed=False):
+    '''Return the fewest whole sun turns after which carrier and
+    planets have also made whole turns.  '''
+    turns = 1
+    for w in rates(ap, ringFixed):
+        turns = turns*w.denominator//gcd(turns, w.denominator)
+    return turns
+
+def placements(ap):
+    '''Return (tooth counts, center distances, line-of-centers angles,
+    mesh angles) of the sun and planets of ap, as arrays, angles in
+    degrees.  '''
+    from gearcore import Gear
+    with contextlib.redirect_stdout(io.StringIO()):   # Mute Gear's chatter
+        gears = [Gear(ap.s, 0, ap)] + [Gear(ap.p, 1+i, ap) for i in range(ap.n)]
+    sun = gears[0]
+    nT = np.array([g.nT for g in gears])
+    dist = np.array([0] + [(sun.pd + g.pd)/2 for g in gears[1:]])
+    loca = np.array([0] + [g.loca for g in gears[1:]])*180/pi
+    sma = np.array([g.sma for g in gears])*180/pi
+    return nT, dist, loca, sma
+
+def transforms(ap, t, turns=1, ringFixed=False):
+    '''Return arrays x, y, and angle (degrees), each len(t) x (n+1), of
+    the sun and planets of ap at animation times t (an array of
+    fractions, 0 to 1, of the whole animation).  '''
+    nT, dist, loca, sma = placements(ap)
+    wc, wp = rates(ap, ringFixed)
+    sunTurn = 360*turns*np.asarray(t, dtype=float)[:,None]   # Sun angle, degrees
+    spin = np.where(np.arange(len(nT)) == 0, 1.0, float(wp))
+    ca = np.radians(loca + float(wc)*sunTurn)                # Planet center angles
+    return dist*np.cos(ca), dist*np.sin(ca), sma + spin*sunTurn
+
+#---------------------------------------------
+def gearModules(ap):
+    '''Return .scad text defining a module gear_<nT>() for each
+    distinct gear of ap, and a list of the module names, sun first.  '''
+    from gearcore import gearSubtree
+    from scadwriter import emit
+    names, text = [], ''
+    for nT in [ap.s] + [ap.p]*ap.n:
+        name = 'gear_{}'.format(nT)
+        if name not in names:
+            body = ''.join(emit(gearSubtree(nT, ap.m, ap.h, ap.lod, ap.instanced)))
+            text += 'module {}() {{{}\n}}\n'.format(name, body.replace('\n', '\n\t'))
+        names.append(name)
+    return text, names
+
+def animationText(ap, turns=1, ringFixed=False):
+    '''Return .scad text of ap animated over $t, for turns sun turns.'''
+    from scadwriter import number
+    text, names = gearModules(ap)
+    nT, dist, loca, sma = placements(ap)
+    wc, wp = rates(ap, ringFixed)
+    f = lambda v: number(v, 4)
+    lines = ['rotate({} + {}*$t) {}();'.format(f(sma[0]), f(360*turns), names[0])]
+    for i in range(1, len(names)):
+        ca = '{} + {}*$t'.format(f(loca[i]), f(360*turns*float(wc)))
+        lines.append('translate([{d}*cos({ca}), {d}*sin({ca}), 0]) rotate({} + {}*$t) {}();'.format(
+            f(sma[i]), f(360*turns*float(wp)), names[i], d=f(dist[i]), ca=ca))
+    return text + '\n' + '\n'.join(lines) + '\n'
+
+def frameTexts(ap, nFrames, turns=1, ringFixed=False):
+    '''Yield .scad text for each of nFrames frames of ap over turns sun
+    turns.  Gear modules are made once; frames differ only in the
+    placements, computed for all frames together.  '''
+    from scadwriter import number
+    text, names = gearModules(ap)
+    x, y, ang = transforms(ap, np.arange(nFrames)/nFrames, turns, ringFixed)
+    for k in range(nFrames):
+        yield text + '\n' + ''.join(
+            'translate([{}, {}, 0]) rotate({}) {}();\n'.format(
+                number(x[k,i], 4), number(y[k,i], 4), number(ang[k,i], 4), names[i])
+            for i in range(len(names)))
+
+def writeFrames(base, ap, nFrames, turns=1, ringFixed=False, header='$fn = 90;\n'):
+    '''Write frames base-0000.scad, etc; return the number written.'''
+    from autoprod import writeAtomic
+    for k, text in enumerate(frameTexts(ap, nFrames, turns, ringFixed)):
+        writeAtomic('{}-{:04d}.scad'.format(base, k), header + text)
+    return nFrames
+
+#---------------------------------------------
+if __name__ == '__main__':
+    from autoprod import writeAtomic
+    from gearcore import GearAssembly, FINAL, checkPlanetary
+    ap = argparse.ArgumentParser(description='Animate a gear2 planetary assembly.')
+    ap.add_argument('params', nargs='*', type=int, default=[20, 25, 31, 23, 5, 7, 13],
+                    help='a g h m n p s, as in gear2.py')
+    ap.add_argument('-f', '--frames', type=int, default=0,
+                    help='write this many frame files (default: one file using $t)')
+    ap.add_argument('-t', '--turns', type=float, default=1, help='sun turns over the animation')
+    ap.add_argument('--loop', action='store_true', help='turn until the animation repeats')
+    ap.add_argument('--ring', action='store_true', help='hold a ring gear still, not the carrier')
+    ap.add_argument('-o', '--out', default='anim', help='output base name')
+    args = ap.parse_args()
+    asm = GearAssembly(*args.params)
+    asm.lod = FINAL
+    turns = loopTurns(asm, args.ring) if args.loop else args.turns
+    for prob in asm.check():
+        print ('Note: {}'.format(prob))
+    if args.ring and not checkPlanetary(asm.s, asm.p, asm.n)['ring']:
+        print ('Note: a ring gear of {} teeth could not assemble with these {} planets'.format(
+            asm.s + 2*asm.p, asm.n))
+    t0 = time.perf_counter()
+    if args.frames:
+        writeFrames(args.out, asm, args.frames, turns, args.ring)
+        what = '{} frames to {}-0000.scad ...'.format(args.frames, args.out)
+    else:
+        writeAtomic(args.out+'.scad', '$fn = 90;\n' + animationText(asm, turns, args.ring))
+        what = '$t animation to {}.scad'.format(args.out)
+    print ('Wrote {} ({} sun turns) in {:.3f} s'.format(what, turns, time.perf_counter()-t0))
@@ -0,0 +1,103 @@
+# autoprod.py, background Produce for the spinbox GUIs.  While a
+# spinbox arrow is held, values change many times a second; rather
+# than produce each value on the Qt thread, the GUIs hand each new
+# parameter set to an AutoProducer.  Its worker thread waits until
+# values have been steady for a debounce interval, then produces only
+# the latest set, as a coarse draft.  If values then stay steady for a
+# settle interval, it produces them again at full quality.  Output
+# goes through writeAtomic, so a file watcher like OpenSCAD's
+# automatic reload sees one complete file per settled state, and no
+# rewrite at all when the text is unchanged.
+
+import copy, gzip, os, tempfile, threading, time, traceback
+from hashlib import sha256
+
+# Default debounce interval, seconds; environment can override it
+debounceDefault = float(os.environ.get('AUTOPROD_DEBOUNCE', '0.15'))
+# Default settle interval, seconds, before a draft is redone at full
+# quality; 0 turns drafts off
+settleDefault = float(os.environ.get('AUTOPROD_SETTLE', '0.6'))
+
+#---------------------------------------------
+class AutoProducer:
+    '''Run produce(ap, draft) on a daemon worker thread.  request()
+    posts a snapshot of parameters ap; if more requests arrive within
+    debounce seconds, earlier ones are dropped, and only the latest one
+    gets produced, with draft true.  If no request arrives within the
+    next settle seconds, ap gets produced again with draft false.  If
+    settle is 0, every produce is with draft false.    '''
+    def __init__(self, produce, debounce=None, settle=None):
+        self.produce = produce
+        self.debounce = debounceDefault if debounce is None else debounce
+        self.settle = settleDefault if settle is None else settle
+        self.pending, self.due, self.final = None, 0, True
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def request(self, ap, now=False):
+        '''Post a copy of ap for producing after the debounce interval,
+        or as soon as the worker is free, and at full quality, if now is
+        true.  '''
+        with self.cond:
+            self.pending = copy.copy(ap)
+            self.final = now or not self.settle
+            self.due = time.monotonic() + (0 if now else self.debounce)
+            self.cond.notify()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while self.pending is None:
+                    self.cond.wait()
+                # Wait until no newer request has come in for a while
+                while time.monotonic() < self.due:
+                    self.cond.wait(self.due - time.monotonic())
+                ap, final = self.pending, self.final
+                if final:
+                    self.pending = None
+                else:     # Leave ap pending, for full quality if it settles
+                    self.final, self.due = True, time.monotonic() + self.settle
+            try:
+                self.produce(ap, draft=not final)
+            except Exception:
+                traceback.print_exc()
+
+#---------------------------------------------
+lastDigest = {}       # Output path -> hash of text last seen there
+
+def writeAtomic(path, text):
+    '''Write text to file path unless the file already holds that text.
+    text is a string, or an iterable of strings (written as they come),
+    and gets gzip-compressed if path ends in .gz.  Write to a temporary
+    file in the same directory, then rename it over path, so readers
+    never see a partly written file.  Return True if the file was
+    written, False if it was left as is.  '''
+    chunks = [text] if isinstance(text, str) else text
+    zipped = path.endswith('.gz')
+    path = os.path.abspath(path)
+    if path not in lastDigest and os.path.exists(path):
+        with (gzip.open if zipped else open)(path, 'rb') as fi:
+            lastDigest[path] = sha256(fi.read()).hexdigest()
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path),
+                               prefix='.'+os.path.basename(path), suffix='.tmp')
+    try:
+        hasher = sha256()
+        with os.fdopen(fd, 'wb') as fo:
+            out = gzip.GzipFile(fileobj=fo, mode='wb', mtime=0) if zipped else fo
+            for chunk in chunks:
+                data = chunk.encode()
+                hasher.update(data)
+                out.write(data)
+            if zipped: out.close()
+        digest = hasher.hexdigest()
+        if lastDigest.get(path) == digest and os.path.exists(path):
+            os.unlink(tmp)
+            return False
+        os.chmod(tmp, 0o644)    # mkstemp makes it private; open it up
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp): os.unlink(tmp)
+        raise
+    lastDigest[path] = digest
+    return True
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+
+# batch.py, headless bulk producer for the gear and leg generators.
+# Reads rows of parameters from a CSV file (with a header line naming
+# the parameters) or a JSONL file (one JSON object per line), makes a
+# model for each row in a pool of worker processes, and writes one
+# uniquely named .scad file per row, plus a manifest.jsonl file that
+# records, for each row, its parameters, output file, and status.
+
+# Each row makes a part of the kind given by its 'kind' field, or of
+# the kind given by the -k option if the row has no 'kind' field:
+#   tooth: spurGear(nT, gmodule, holeDiam, gthick, pressAngle)
+#   gear2: GearAssembly(a,g,h,m,n,p,s).makeAssembly()
+#   legs:  ArmParams(p,q,s,t,u,w).getOblongArm()
+# Parameters left out of a row take the generator's default values.
+# A row's lod field, draft or final, sets the level of detail (facets
+# per circle by size, and points per tooth or arc); with no lod field,
+# circles use the file's $fn.
+# legs rows may give target measures (length, width, rightRadius,
+# leftRadius, area; see legfit.py) instead of some parameters; then
+# p,q,s,t,u,w are fitted to them first, starting from the row's
+# values, and the manifest records the fitted values.
+# gear2 rows are checked with GearAssembly.check() first (planets
+# clear of each other, hole inside root circles), and
+# invalid ones are rejected without being rendered, unless the row
+# has check=0.
+# With --cache, rows whose output is in the prodcache.py disk cache
+# are copied from there instead of being made again.
+# With --store base, batch.py also saves the 2D outlines of tooth and
+# legs rows in an outline store (base.npy and base.json; see
+# outline.py), indexed by row, kind, and parameters.
+# With --density d (g/cm^3), the manifest also gives each tooth and
+# legs row's area, volume, and mass, computed from exact geometry by
+# massprops.py as part of producing the row, and the total mass is
+# printed.  gear2 rows get none, their .scad gears being stacked
+# cylinders, not solids to print.
+# Output goes through scadwriter.writeScad; --places and --minify set
+# its number rounding and whitespace, and --gzip writes .scad.gz files.
+# A row that fails is recorded in the manifest with its error message,
+# and the rest of the run goes on.
+
+# Example:  ./batch.py -k legs -j 4 -o legsOut legRows.csv
+
+import argparse, contextlib, csv, io, json, os, sys, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from hashlib import sha1
+
+#---------------------------------------------
+def makeTooth(nT=20, gmodule=3.0, holeDiam=3.175, gthick=4, pressAngle=28, instanced=False,
+              lod=None):
+    from tooth import spurGear
+    from gearcore import lods
+    return spurGear(nT, gmodule, holeDiam, gthick, pressAngle, instanced, lods.get(lod))
+
+def makeGear2(a=20, g=25, h=31, m=23, n=5, p=7, s=13, instanced=False, lod=None,
+              check=True):
+    from gearcore import GearAssembly, lods
+    ap = GearAssembly(a,g,h,m,n,p,s)
+    ap.instanced, ap.lod = instanced, lods.get(lod)
+    probs = ap.check() if check else []
+    if probs:
+        raise ValueError('invalid assembly: ' + '; '.join(probs))
+    return ap.makeAssembly()
+
+def makeLegs(p=40, q=10, s=-30, t=-100, u=40, w=-20, analytic=False, tol=0.01, lod=None):
+    from gearcore import ArmParams, lods
+    ap = ArmParams(p,q,s,t,u,w)
+    ap.analytic, ap.tol, ap.lod = analytic, tol, lods.get(lod)
+    return ap.getOblongArm()
+
+def toothOutline(nT=20, gmodule=3.0, holeDiam=3.175, gthick=4, pressAngle=28, instanced=False,
+                 lod=None):
+    from tooth import gearOutline
+    from gearcore import lods
+    return gearOutline(nT, gmodule, pressAngle, lods[lod].nradii if lod else 6)
+
+def legsOutline(p=40, q=10, s=-30, t=-100, u=40, w=-20, analytic=False, tol=0.01, lod=None):
+    from gearcore import ArmParams, lods
+    from outline import Outline
+    ap = ArmParams(p,q,s,t,u,w)
+    ap.tol, ap.lod = tol, lods.get(lod)
+    return Outline(ap.getArmOutline())
+
+def fitLegsRow(params):
+    '''Return params (a legs row) with any legfit target measures in it
+    replaced by p,q,s,t,u,w fitted to them, starting from the row's
+    own (or default) values; and the fit's info, or None if params has
+    no targets.  Raise ValueError if the targets can't be met.  '''
+    from legfit import fitLeg, measureNames, defaultStart
+    targets = {k: params[k] for k in measureNames if k in params}
+    if not targets: return params, None
+    rest = {k: v for k, v in params.items() if k not in targets}
+    prm, info = fitLeg(targets, [rest.get(k, d) for k, d in zip('pqstuw', defaultStart)])
+    if not info['ok']:
+        raise ValueError('no leg fits {} (relative error {:.2g})'.format(targets, info['err']))
+    rest.update(zip('pqstuw', prm))
+    return rest, info
+
+# Kind name -> (maker function, .scad file header, outline function)
+kinds = {'tooth': (makeTooth, '', toothOutline),
+         'gear2': (makeGear2, '$fn = 90;', None),
+         'legs':  (makeLegs,  '$fn = 90;', legsOutline)}
+
+#---------------------------------------------
+def number(v):
+    '''Convert a CSV field to int or float if it looks like one.'''
+    if not isinstance(v, str): return v
+    for conv in (int, float):
+        try:    return conv(v)
+        except ValueError: pass
+    return v
+
+def readRows(path):
+    '''Return a list of parameter dicts read from a .csv or .jsonl file.'''
+    with open(path, newline='') as fi:
+        if path.endswith('.csv'):
+            return [{k: number(v) for k,v in row.items() if v not in (None, '')}
+                    for row in csv.DictReader(fi)]
+        return [json.loads(line) for line in fi if line.strip()]
+
+def outName(kind, index, params, ext='.scad'):
+    '''Return a file name unique to this row and its parameter values.'''
+    key = sha1(json.dumps([kind, params], sort_keys=True).encode()).hexdigest()[:8]
+    return '{}-{:05d}-{}{}'.format(kind, index, key, ext)
+
+#---------------------------------------------
+def produceRow(job):
+    '''Make and write the model for one row.  Return a manifest record;
+    errors are caught and recorded there rather than raised.  '''
+    index, kind, params, outDir, opts = job
+    rec = {'row': index, 'kind': kind, 'params': params, 'status': 'ok'}
+    t0 = time.perf_counter()
+    try:
+        from scadwriter import writeScad
+        from gearcore import lods
+        make, header, outline = kinds[kind]
+        if params.get('lod') is not None and params['lod'] not in lods:
+            raise ValueError('unknown lod {!r}; use {}'.format(params['lod'], ', '.join(lods)))
+        if kind == 'legs':
+            params, fit = fitLegsRow(params)
+            if fit:
+                rec['fitted'] = {k: round(params[k], 6) for k in 'pqstuw'}
+        with contextlib.redirect_stdout(io.StringIO()): # Mute generator chatter
+            if opts.get('store') and outline:
+                rec['outline'] = outline(**params)
+        ext = '.scad.gz' if opts.get('gzip') else '.scad'
+        path = os.path.join(outDir, outName(kind, index, params, ext))
+        key = None
+        if opts.get('cache'):
+            import prodcache
+            key = prodcache.key('batch-'+kind, {'params': params, 'places': opts.get('places'),
+                                                'minify': opts.get('minify')}, params.get('lod'))
+        if key and prodcache.fetch(key, path) is not None:
+            rec['cached'] = True
+        else:
+            with contextlib.redirect_stdout(io.StringIO()):
+                asm = make(**params)
+            writeScad(path, asm, header, opts.get('places'), opts.get('minify'))
+            if key: prodcache.store(key, path)
+        if opts.get('density') and kind in ('tooth', 'legs'):
+            rec.update(rowMass(kind, params, opts['density']))
+        rec['file'], rec['bytes'] = path, os.path.getsize(path)
+    except Exception as e:
+        rec['status'], rec['error'] = 'error', '{}: {}'.format(type(e).__name__, e)
+    rec['seconds'] = round(time.perf_counter() - t0, 6)
+    return rec
+
+def runBatch(rows, kind, outDir, workers=None, opts={}):
+    '''Produce all rows across a pool of worker processes; write
+    manifest.jsonl in outDir, and return its records in row order.
+    opts may set places, minify, and gzip for the writer; store, the
+    base name of an outline store to save outlines in; and density,
+    for mass properties.  '''
+    os.makedirs(outDir, exist_ok=True)
+    jobs = []
+    for i, row in enumerate(rows):
+        row = dict(row)
+        jobs.append((i, row.pop('kind', kind), row, outDir, opts))
+    recs = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futs = {pool.submit(produceRow, job): job for job in jobs}
+        for fut in as_completed(futs):
+            try:
+                recs.append(fut.result())
+            except Exception as e:  # Worker died; record it, go on
+                i, k, params = futs[fut][:3]
+                recs.append({'row': i, 'kind': k, 'params': params, 'status': 'error',
+                             'error': '{}: {}'.format(type(e).__name__, e)})
+    recs.sort(key=lambda r: r['row'])
+    if opts.get('store'):
+        from outline import saveOutlines
+        have = [r for r in recs if 'outline' in r]
+        saveOutlines(opts['store'], [r.pop('outline') for r in have],
+                     [{'row': r['row'], 'kind': r['kind'], 'params': r['params']} for r in have])
+    with open(os.path.join(outDir, 'manifest.jsonl'), 'w') as fo:
+        for r in recs:
+            fo.write(json.dumps(r) + '\n')
+    return recs
+
+def rowMass(kind, params, density):
+    '''Return a dict of area (mm^2), volume (mm^3), and mass (g) of the
+    part for a tooth or legs row with params (fitted, if a legs row had
+    targets), for density in g/cm^3.  gear2 rows have none: massprops
+    models involute gears, as plate.py makes them, not the stacked
+    cylinders written for gear2 rows.  '''
+    from massprops import kinds as massKinds, partMoments, properties
+    M, thick, proud = partMoments([massKinds[kind](**params)])
+    props = properties(M, thick, density, proud)
+    return {k: round(float(props[k][0]), 6) for k in ('area', 'volume', 'mass')}
+
+#---------------------------------------------
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Produce .scad files for rows of gear or leg parameters.')
+    ap.add_argument('rows', help='.csv or .jsonl file of parameter rows')
+    ap.add_argument('-k', '--kind', choices=sorted(kinds), default='tooth',
+                    help='kind of part for rows without a kind field (default: tooth)')
+    ap.add_argument('-j', '--workers', type=int, default=None,
+                    help='number of worker processes (default: number of CPUs)')
+    ap.add_argument('-o', '--outdir', default='batchOut', help='output directory')
+    ap.add_argument('--places', type=int, default=None,
+                    help='decimal places for numbers (default: SCAD_PLACES or 4)')
+    ap.add_argument('--minify', action='store_true', help='leave out indentation and spaces')
+    ap.add_argument('--gzip', action='store_true', help='write gzipped .scad.gz files')
+    ap.add_argument('--cache', action='store_true',
+                    help='reuse, and add to, cached output (see prodcache.py)')
+    ap.add_argument('--store', help='also save tooth and legs outlines in store STORE.npy/.json')
+    ap.add_argument('--density', type=float, default=None,
+                    help='add area, volume, and mass (g) for this density, g/cm^3')
+    args = ap.parse_args()
+    t0 = time.perf_counter()
+    opts = {'places': args.places, 'minify': args.minify or None, 'gzip': args.gzip,
+            'store': args.store, 'cache': args.cache, 'density': args.density}
+    recs = runBatch(readRows(args.rows), args.kind, args.outdir, args.workers, opts)
+    nbad = sum(r['status'] != 'ok' for r in recs)
+    for r in recs:
+        if r['status'] != 'ok':
+            print ('Row {} ({}): {}'.format(r['row'], r['kind'], r['error']))
+    print ('Wrote {} of {} rows to {} in {:.2f} s'.format(
+        len(recs)-nbad, len(recs), args.outdir, time.perf_counter()-t0))
+    if args.density:
+        print ('Total mass {:.3f} g at {} g/cm^3'.format(
+            sum(r.get('mass', 0) for r in recs), args.density))
+    sys.exit(1 if nbad else 0)
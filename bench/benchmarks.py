@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+
+# bench/benchmarks.py, timing harness for the generators.  Each case
+# is one function run over a list of parameter values.  For each
+# (case, value) it records the best wall time over several runs, the
+# peak memory Python allocated during one run (via tracemalloc), and,
+# for cases that write, the byte count of the .scad file.  Those write
+# as the GUIs and batch.py do, through scadwriter.writeScad, to a
+# fresh file in a temporary directory each run.
+# Results can be saved as a JSON baseline and compared against one
+# saved earlier, so changes to the generators can be checked against
+# production-sized parts.
+
+# Usage: bench/benchmarks.py [-k substring] [-r repeats]
+#            [--save results.json] [--compare baseline.json]
+
+import argparse, atexit, contextlib, io, json, os, platform, shutil, sys, tempfile, time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+#---------------------------------------------
+# Each case function takes one parameter value, does the work to be
+# timed, and returns the byte count of the .scad file it wrote, or None
+outDir = None
+
+def writeOut(obj, header=''):
+    '''Write obj to a fresh .scad file via writeScad; return its size.'''
+    global outDir
+    from scadwriter import writeScad
+    if outDir is None:
+        outDir = tempfile.mkdtemp(prefix='bench')
+        atexit.register(shutil.rmtree, outDir, True)
+    path = os.path.join(outDir, 'bench.scad')
+    if os.path.exists(path):
+        os.unlink(path)         # So writeScad writes it, not skips it as unchanged
+    writeScad(path, obj, header)
+    return os.path.getsize(path)
+
+def spurGearProfile(nT):
+    import tooth
+    tooth.clearProfileCache()   # Time computing, not cache lookup
+    tooth.gearProfile(nT, 1)
+
+def spurGearWrite(nT):
+    import tooth
+    tooth.clearProfileCache()
+    return writeOut(tooth.spurGear(nT, 1))
+
+def makeAssembly(n):
+    from gearcore import GearAssembly, clearGearCache
+    clearGearCache()            # Time building gears, not cache lookup
+    return GearAssembly(20, 25, 31, 23, n, 7, 13).makeAssembly()
+
+def makeAssemblyCached(n):
+    from gearcore import GearAssembly
+    return GearAssembly(20, 25, 31, 23, n, 7, 13).makeAssembly()
+
+def writeAssembly(n):
+    return writeOut(makeAssembly(n), '$fn = 90;')
+
+def gearSubtree(nT):
+    from gearcore import gearSubtree, clearGearCache
+    clearGearCache()
+    return writeOut(gearSubtree(nT, 23, 31, None, False))
+
+def getOblongArm(analytic):
+    from gearcore import ArmParams
+    ap = ArmParams(40, 10, -30, -100, 40, -20)
+    ap.analytic = analytic
+    return ap.getOblongArm()
+
+def writeArm(analytic):
+    return writeOut(getOblongArm(analytic), '$fn = 90;')
+
+def solveArcArc(n):
+    from gearcore import ArmParams
+    ap = ArmParams(40, 10, -30, -100, 40, -20)
+    for i in range(n):
+        ap.solveArcArc(40, 10, -30, -100, 40*i/n)
+
+def solveArcArcArray(n):
+    import numpy as np
+    from gearcore import ArmParams
+    ArmParams.solveArcArcArray(40, 10, -30, -100, 40*np.arange(n)/n)
+
+def fitLeg(n):
+    from legfit import fitLeg
+    for i in range(n):
+        L, W = 100 + i%50, 30 + i%7
+        fitLeg({'length': L, 'width': W, 'area': L*W*(0.76 + i%5/100)})
+
+def searchPlanetary(smax):
+    from planetsearch import searchPlanetary
+    searchPlanetary(4.5, sRange=(6, smax), pRange=(6, smax), nRange=(2, 10), mods=range(3, 31))
+
+def plateLayout(n):
+    import plate
+    parts = []
+    for i in range(n):
+        parts += plate.toothPart(8 + i%33, 1 + i%3/2) if i%3 else plate.legsPart(u=20 + i%31)
+    plate.layout(parts)
+
+# Case name -> (function, parameter values)
+cases = {
+    'spurGear.profile':   (spurGearProfile, [8, 20, 50, 100, 200, 500]),
+    'spurGear.write':     (spurGearWrite, [8, 20, 50, 100, 200, 500]),
+    'gear2.makeAssembly': (makeAssembly, [1, 2, 3, 5, 8]),
+    'gear2.makeAssembly.cached': (makeAssemblyCached, [1, 2, 3, 5, 8]),
+    'gear2.write':        (writeAssembly, [1, 2, 3, 5, 8]),
+    'gear2.subtree':      (gearSubtree, [20, 100, 400, 1600, 3200]),
+    'legs.getOblongArm':  (getOblongArm, [False, True]),
+    'legs.write':         (writeArm, [False, True]),
+    'legs.solveArcArc':   (solveArcArc, [1, 1000]),
+    'legs.solveArcArcArray': (solveArcArcArray, [1, 1000]),
+    'legs.fit':           (fitLeg, [1, 100]),
+    'planetsearch':       (searchPlanetary, [50, 200]),
+    'plate.layout':       (plateLayout, [100, 500]),
+}
+
+#---------------------------------------------
+def measure(func, arg, repeat=5):
+    '''Return a result dict of best time, peak memory, and .scad file
+    bytes for func(arg).  Output the function prints is discarded.  '''
+    best = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(repeat):
+            t0 = time.perf_counter()
+            out = func(arg)
+            dt = time.perf_counter() - t0
+            best = dt if best is None else min(best, dt)
+        tracemalloc.start()
+        func(arg)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    res = {'seconds': best, 'peakBytes': peak}
+    if isinstance(out, int):
+        res['scadBytes'] = out
+    return res
+
+def runCases(pattern='', repeat=5):
+    '''Run all cases whose names contain pattern; return results as a
+    dict of 'case[value]' -> result dict.  '''
+    results = {}
+    for name, (func, args) in cases.items():
+        if pattern not in name: continue
+        for arg in args:
+            results['{}[{}]'.format(name, arg)] = measure(func, arg, repeat)
+    return results
+
+def report(results, baseline=None):
+    print ('{:34} {:>10} {:>10} {:>10} {:>8}'.format('case', 'ms', 'peak KB', 'scad B', 'vs base'))
+    for key, r in results.items():
+        ratio = ''
+        if baseline and key in baseline:
+            ratio = '{:7.2f}x'.format(r['seconds']/baseline[key]['seconds'])
+        print ('{:34} {:10.3f} {:10.1f} {:>10} {:>8}'.format(key, r['seconds']*1000,
+               r['peakBytes']/1024, r.get('scadBytes', ''), ratio))
+
+#---------------------------------------------
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Time gear and leg generators.')
+    ap.add_argument('-k', dest='pattern', default='', help='run only cases containing this')
+    ap.add_argument('-r', '--repeat', type=int, default=5, help='runs per case; best counts')
+    ap.add_argument('--save', help='write results to this JSON file')
+    ap.add_argument('--compare', help='JSON file of earlier results to compare against')
+    args = ap.parse_args()
+    baseline = None
+    if args.compare:
+        with open(args.compare) as fi:
+            baseline = json.load(fi)['results']
+    results = runCases(args.pattern, args.repeat)
+    report(results, baseline)
+    if args.save:
+        with open(args.save, 'w') as fo:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'when': time.strftime('%Y-%m-%d %H:%M:%S'), 'results': results},
+                      fo, indent=1)
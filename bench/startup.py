@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+# bench/startup.py, enforces an import-time budget on the headless
+# core and on the scripts built over it.  Each module is imported in
+# a fresh interpreter several times; the best time must fit within
+# the budget, and the import must not have loaded Qt or SolidPython.
+# Exits with status 1 if any module fails.
+
+# Usage: bench/startup.py [--budget seconds] [--reps n]
+
+import argparse, json, os, subprocess, sys
+
+repoDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+modules = ['gearcore', 'tooth', 'gear1', 'gear2', 'spinboxLegs', 'batch']
+forbidden = ('PyQt5', 'solid')
+
+probe = '''import sys, time, json
+t0 = time.perf_counter()
+import {}
+dt = time.perf_counter() - t0
+print (json.dumps([dt, sorted({{m.split('.')[0] for m in sys.modules}} & set({!r}))]))
+'''
+
+def importTime(mod, reps=5):
+    '''Return (best seconds to import mod, forbidden packages loaded).'''
+    best, loaded = None, []
+    for i in range(reps):
+        out = subprocess.run([sys.executable, '-c', probe.format(mod, forbidden)],
+                             cwd=repoDir, capture_output=True, text=True, check=True)
+        dt, loaded = json.loads(out.stdout.strip().splitlines()[-1])
+        best = dt if best is None else min(best, dt)
+    return best, loaded
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Check import times of headless modules.')
+    ap.add_argument('--budget', type=float, default=0.3, help='seconds allowed per import')
+    ap.add_argument('--reps', type=int, default=5, help='imports per module; best counts')
+    args = ap.parse_args()
+    fails = 0
+    for mod in modules:
+        dt, loaded = importTime(mod, args.reps)
+        ok = dt <= args.budget and not loaded
+        fails += not ok
+        print ('{:12} {:7.1f} ms  {}{}'.format(mod, dt*1000, 'ok' if ok else 'FAIL',
+               '  (loaded {})'.format(', '.join(loaded)) if loaded else ''))
+    sys.exit(1 if fails else 0)
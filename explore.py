@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+# explore.py, evaluates neighborhoods of a design's parameters.  Given
+# a gear2 GearAssembly or spinboxLegs ArmParams parameter set and one
+# or two of its parameters to vary, makes a grid of neighboring
+# variants and evaluates each in a pool of worker processes, giving
+# its preview shapes (see previewShapes in gearcore.py) and its
+# problems (from its check method).  Results come back in whatever
+# order they finish.  The GUIs' Explore windows (ExploreWindow, in
+# previewpane.py) poll for them and fill in thumbnails as they come.
+
+# Usage: ./explore.py [-j workers] [--span k] [--step d] kind x[:y] [name=value ...]
+# prints each variant of kind (gear2 or legs), varying x, and y if
+# given, around the default or given values, with its problems or ok,
+# eg: ./explore.py gear2 n:p s=15
+
+import argparse, queue, time
+from concurrent.futures import ProcessPoolExecutor
+
+# Kind name -> (gearcore class name, parameter names in constructor
+# order, default values)
+kinds = {'gear2': ('GearAssembly', 'aghmnps', (20, 25, 31, 23, 5, 7, 13)),
+         'legs':  ('ArmParams',    'pqstuw',  (40, 10, -30, -100, 40, -20))}
+
+#---------------------------------------------
+def variantGrid(params, xName, yName=None, span=2, step=1):
+    '''Return a list of (column, row, params) for variants of params (a
+    dict): xName goes up by step across 2*span+1 columns, and yName, if
+    given, up by step down 2*span+1 rows.  params is at the center.  '''
+    offs = range(-span, span+1)
+    out = []
+    for j, dy in enumerate(offs if yName else [0]):
+        for i, dx in enumerate(offs):
+            v = dict(params)
+            v[xName] += dx*step
+            if yName: v[yName] += dy*step
+            out.append((i, j, v))
+    return out
+
+def evaluate(kind, params):
+    '''Return (shapes, problems) for variant params of kind: its preview
+    shapes, and a list of its problems, empty if it is valid.  '''
+    import gearcore
+    cname, names, dflt = kinds[kind]
+    obj = getattr(gearcore, cname)(*[params[k] for k in names])
+    try:
+        probs = obj.check()
+        shapes = obj.previewShapes()
+    except (ValueError, ZeroDivisionError, FloatingPointError) as e:
+        return [], ['{}: {}'.format(type(e).__name__, e)]
+    if not shapes and not probs:
+        probs = ['no geometry']
+    return shapes, probs
+
+#---------------------------------------------
+class Explorer:
+    '''Evaluates variants in a pool of worker processes, started when
+    first needed.  Each start() begins a new generation of work and
+    cancels whatever of earlier ones hasn't started; poll() returns
+    the results of the current generation as they finish.  '''
+    def __init__(self, workers=None):
+        self.workers = workers
+        self.pool, self.gen, self.futs = None, 0, []
+        self.done = queue.Queue()   # (gen, key, future), filled by pool threads
+
+    def start(self, kind, cells):
+        '''Submit cells, a list of (key, params), for evaluation, in
+        that order.  Return the new generation number.  '''
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        for f in self.futs:
+            f.cancel()
+        self.gen += 1
+        self.futs = []
+        for key, params in cells:
+            f = self.pool.submit(evaluate, kind, params)
+            f.add_done_callback(lambda f, key=key, gen=self.gen: self.done.put((gen, key, f)))
+            self.futs.append(f)
+        return self.gen
+
+    def poll(self):
+        '''Return a list of (key, shapes, problems) for the current
+        generation's cells that finished since the last poll.  '''
+        out = []
+        while True:
+            try:
+                gen, key, f = self.done.get_nowait()
+            except queue.Empty:
+                return out
+            if gen != self.gen or f.cancelled(): continue
+            try:
+                shapes, probs = f.result()
+            except Exception as e:  # Worker died; show it as a problem
+                shapes, probs = [], ['{}: {}'.format(type(e).__name__, e)]
+            out.append((key, shapes, probs))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool, self.futs = None, []
+
+#---------------------------------------------
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Check a grid of variants of a design.')
+    ap.add_argument('kind', choices=sorted(kinds))
+    ap.add_argument('axes', help='parameter to vary, or x:y for two')
+    ap.add_argument('values', nargs='*', help='name=value settings of other parameters')
+    ap.add_argument('-j', '--workers', type=int, default=None, help='worker processes')
+    ap.add_argument('--span', type=int, default=2, help='variants each side of center')
+    ap.add_argument('--step', type=int, default=1, help='change per variant')
+    args = ap.parse_args()
+    cname, names, dflt = kinds[args.kind]
+    params = dict(zip(names, dflt))
+    for nv in args.values:
+        k, v = nv.split('=')
+        params[k] = int(v)
+    xName, yName = (args.axes.split(':') + [None])[:2]
+    cells = variantGrid(params, xName, yName, args.span, args.step)
+    t0 = time.perf_counter()
+    ex = Explorer(args.workers)
+    ex.start(args.kind, [((i, j), v) for i, j, v in cells])
+    probs = {}
+    while len(probs) < len(cells):
+        for key, shapes, pl in ex.poll():
+            probs[key] = pl
+        time.sleep(0.005)
+    ex.close()
+    print ('{} variants in {:.3f} s'.format(len(cells), time.perf_counter()-t0))
+    for i, j, v in cells:
+        print ('{:<16} {}'.format(' '.join('{}={}'.format(k, v[k]) for k in (xName, yName) if k),
+                                  '; '.join(probs[(i, j)]) or 'ok'))
@@ -6,17 +6,16 @@
 # Whenever you click Produce, this program will output a file
 # 'gear1.scad' with .scad code modeling an object.  If AutoProd is
 # green (turned on) Produce will occur whenever you change a value in
-# a spinbox or click Produce.
+# a spinbox or click Produce.  The preview pane below the spinboxes
+# is redrawn from the in-memory geometry at every change; it never
+# waits on .scad output.
 
-import sys
-from math import sqrt, pi
-from PyQt5.QtWidgets import QGridLayout, QSpinBox, QLabel
-from PyQt5.QtWidgets import QApplication, QWidget, QPushButton
-
-from solid import circle, color, cube, cylinder, text
-from solid import scad_render_to_file, translate
-from solid.utils import up, down, left, right, forward, back
-from solid.utils import Black, Cyan, Green, Red, Magenta
+import os, sys, time
+from autoprod import AutoProducer
+from scadwriter import writeScad
+import prodcache, prodstats
+from prodstats import ProduceStats, countNodes
+from gearcore import GearParams, DRAFT, FINAL
 
 #---------------------------------------------
 class CallData:
@@ -25,9 +24,11 @@ class CallData:
     def __init__(self):
         pass
     autoProduce = False
+    producer = None             # AutoProducer that runs produceOutput
+    preview = None              # PreviewPane drawing the geometry
     #---------------------------------------------
     @staticmethod
-    def buttonLabels():    return ['Quit', 'Produce', 'AutoProd']
+    def buttonLabels():    return ['Quit', 'Produce', 'AutoProd', 'Profile']
     #---------------------------------------------
     @classmethod
     def makeClickFunc(c, bu,bun):
@@ -49,8 +50,20 @@ class CallData:
         data = [ap.p, ap.s, ap.t, ap.q, ap.u, ap.w]
         data[slN] = v
         ap.p, ap.s, ap.t, ap.q, ap.u, ap.w = data
+        c.showPreview(ap)
         # At any spinbox change, run Produce if AutoProd is on
-        if c.autoProduce:  produceOutput(ap)
+        if c.autoProduce:  c.producer.request(ap)
+    #---------------------------------------------
+    @classmethod
+    def showPreview(c, ap):
+        '''Redraw the preview pane from ap's geometry'''
+        if c.preview is None: return
+        t0 = time.perf_counter()
+        try:
+            shapes = ap.previewShapes()
+        except (ValueError, ZeroDivisionError, FloatingPointError):
+            shapes = []
+        c.preview.setShapes(shapes, (time.perf_counter()-t0)*1000)
     #---------------------------------------------
     @classmethod
     def on_buttonClick(c, bu, bun):
@@ -62,75 +75,55 @@ class CallData:
         '''
         bt = c.buttonLabels()[bun]
         if   bt=='Quit':      sys.exit()
-        elif bt=='Produce':   produceOutput(bu.parentWidget().armParam)
+        elif bt=='Produce':   c.producer.request(bu.parentWidget().armParam, now=True)
         elif bt=='AutoProd':
             c.autoProduce = not c.autoProduce
             color = 'green' if c.autoProduce else 'khaki'
             bu.setStyleSheet('QPushButton {background-color: %s;}'%color)
+        elif bt=='Profile':     # Toggle cProfile capture, and stats
+            prodstats.profiling = not prodstats.profiling
+            prodstats.enabled = prodstats.enabled or prodstats.profiling
+            color = 'green' if prodstats.profiling else 'khaki'
+            bu.setStyleSheet('QPushButton {background-color: %s;}'%color)
         else:
             print ('B{} {} {} click'.format(bun, bt, bu.text()))
 #---------------------------------------------
-class GearParams:
-    '''Class for gear assembly data.  Data items include:
-    p, Pressure angle, degrees
-    s, Module, mm 
-    t, Thickness, mm
-    q, Center gear tooth count
-    u, Planet gear tooth count
-    w, Number of planets
-    [v0 only draws the center gear]
-
-    Gears have several diameters that are relevant, principally root,
-    pitch, and tip diameters.  Drawings should show pitch circles of
-    two meshing gears as tangent, their root circles separated by 2.5
-    times the module, and their tip circles overlapped by twice the
-    module.  At the pitch circle, tooth-to-tooth distance equals the
-    module.  Hence, pitch circle circumference is an integer multiple
-    of module.
-    '''
-        
-    def __init__(self, p,q,s,t,u,w):
-        self.ready = False
-        self.p = p
-        self.q = q
-        self.s = s
-        self.t = t
-        self.u = u
-        self.w = w
-        #print ('p {}  q {}  s {}  t {}  u {}  w {}'.format(p,q,s,t,u,w))
-        modul, cteeth, pteeth, pangle = s, q, u, p
-         # Compute center-gear pitch diameter from tooth count
-        self.cdp = (cteeth * modul)/pi
-        # Compute root and tip diameters - per following:
-        # https://khkgears.net/new/gear_knowledge/abcs_of_gears-b/basic_gear_terminology_calculation.html
-        self.dt = self.cdp + 2  *modul # Gear tip diameter
-        self.dr = self.cdp - 2.5*modul # Gear root diameter
-
-    def makeGear(self):
-        print ('Make gear')
-        ccdr = color(Black)(cylinder(d=self.dr, h=1.2))
-        ccdp = color(Magenta)(cylinder(d=self.cdp, h=1.1))
-        cctp = color(Green)(cylinder(d=self.dt, h=1.0))
-        return ccdr+ccdp+cctp
-    
-#     Cyan, Green, Red, Magenta
-#---------------------------------------------
-def produceOutput(ap):
+def produceOutput(ap, draft=False):
+    '''Write .scad code for ap; coarse if draft, else full quality.'''
     if not ap.ready: return
-    asm = ap.makeGear()
-    cylSegments, version, title = 90, 1, 'gear'
-    cylSet_fn = '$fn = {};'.format(cylSegments)
+    ap.lod = DRAFT if draft else FINAL
+    version, title = 1, 'gear'
+    cylSet_fn = '$fn = {};'.format(ap.lod.hdrSegs)
     asmFile = '{}{}.scad'.format(title, version)
-    scad_render_to_file(asm, asmFile, file_header=cylSet_fn, include_orig_code=False)
-    print ('Wrote scad code to {}'.format(asmFile))
+    params = {k: getattr(ap, k) for k in 'pqstuw'}
+    key = prodcache.key('gear1', params, ap.lod.name) if prodcache.enabled else None
+    with ProduceStats('gear1') as st:
+        with st.stage('cache'):  wrote = prodcache.fetch(key, asmFile) if key else None
+        if wrote is None:       # Not cached; make it
+            with st.stage('build'):  asm = ap.makeGear()
+            with st.stage('write'):  wrote = writeScad(asmFile, asm, cylSet_fn)
+            if key: prodcache.store(key, asmFile)
+            if prodstats.enabled:
+                st.note(nodes=countNodes(asm), bytes=os.path.getsize(asmFile), wrote=wrote, lod=ap.lod.name)
+        elif prodstats.enabled:
+            st.note(cached=True, bytes=os.path.getsize(asmFile), wrote=wrote, lod=ap.lod.name)
+    if wrote:
+        print ('Wrote {} scad code to {}'.format(ap.lod.name, asmFile))
+    else:
+        print ('No change to {}'.format(asmFile))
 #---------------------------------------------
 if __name__ == '__main__':
+    from PyQt5.QtWidgets import QGridLayout, QSpinBox, QLabel
+    from PyQt5.QtWidgets import QApplication, QWidget, QPushButton
+    from PyQt5.QtCore import QTimer
+    from previewpane import PreviewPane
     app = QApplication(sys.argv)    # Create a Qt application, first thing
     widget = QWidget()
     widget.setWindowTitle('Some design')
     widget.setStyleSheet('QGridLayout {background-color: khaki; color: lightcyan}')
     widget.setStyleSheet('QPushButton {background-color: khaki;}')
     panes = QGridLayout(widget)
+    CallData.producer = AutoProducer(produceOutput)
     p,s,t,q,u,w  = 20, 2, 3, 32, 32, 1
     aarm = GearParams(p,q,s,t,u,w)
     # Make pushbuttons
@@ -140,8 +133,6 @@ if __name__ == '__main__':
         bu = QPushButton(txt)
         panes.addWidget(bu, 0, k) # Button in row 0, column k
         bu.clicked.connect(CallData.makeClickFunc(bu, k))
-        if txt=='AutoProd':
-            CallData.on_buttonClick(bu, k) # Toggle AutoProd on
 
     widget.armParam = aarm      # Produce needs a link to aarm
     slo, shi = 0, 999
@@ -168,6 +159,20 @@ if __name__ == '__main__':
         panes.addWidget(QLabel(varn),   ro, 3) # var-name in cell (ro,3)
         ro += 1
 
+    # Status line, showing stage timings of the latest Produce
+    status = QLabel('')
+    panes.addWidget(status, ro, 0, 1, 4)
+    def showStats():
+        if prodstats.last != status.text(): status.setText(prodstats.last)
+    statsTimer = QTimer()
+    statsTimer.timeout.connect(showStats)
+    statsTimer.start(250)
+
+    # Preview pane, below the status line
+    CallData.preview = PreviewPane()
+    panes.addWidget(CallData.preview, ro+1, 0, 1, 4)
+    CallData.showPreview(aarm)
+
     aarm.ready = True           # Now allow Produce to occur
     widget.show()               # Show the window
     app.exec_()                 # Run the app
@@ -6,17 +6,16 @@
 # Whenever you click Produce, this program will output a file
 # 'gear1.scad' with .scad code modeling an object.  If AutoProd is
 # green (turned on) Produce will occur whenever you change a value in
-# a spinbox or click Produce.
+# a spinbox or click Produce.  The preview pane below the spinboxes
+# is redrawn from the in-memory geometry at every change; it never
+# waits on .scad output.
 
-import sys
-from math import sqrt, pi, sin, cos
-from PyQt5.QtWidgets import QGridLayout, QSpinBox, QLabel
-from PyQt5.QtWidgets import QApplication, QWidget, QPushButton
-
-from solid import circle, color, cube, cylinder, text
-from solid import rotate, scad_render_to_file, translate
-from solid.utils import up, down, left, right, forward, back
-from solid.utils import Black, Cyan, Green, Red, Magenta
+import os, sys, time
+from autoprod import AutoProducer
+from scadwriter import writeScad
+import prodcache, prodstats
+from prodstats import ProduceStats, countNodes
+from gearcore import GearAssembly, DRAFT, FINAL, gearCacheInfo
 
 #---------------------------------------------
 class CallData:
@@ -25,9 +24,13 @@ class CallData:
     def __init__(self):
         pass
     autoProduce = False
+    producer = None             # AutoProducer that runs produceOutput
+    preview = None              # PreviewPane drawing the geometry
+    exploreWin = None           # ExploreWindow, made at first Explore click
+    checkLabel = None           # QLabel listing problems with the assembly
     #---------------------------------------------
     @staticmethod
-    def buttonLabels():    return ['Quit', 'Produce', 'AutoProd']
+    def buttonLabels():    return ['Quit', 'Produce', 'AutoProd', 'Profile', 'Explore']
     #---------------------------------------------
     @classmethod
     def makeClickFunc(c, bu,bun):
@@ -49,8 +52,37 @@ class CallData:
         data = [ap.a, ap.g, ap.h, ap.m, ap.n, ap.p, ap.s]
         data[slN] = v
         ap.a, ap.g, ap.h, ap.m, ap.n, ap.p, ap.s = data
+        c.showCheck(ap)
+        c.showPreview(ap)
         # At any spinbox change, run Produce if AutoProd is on
-        if c.autoProduce:  produceOutput(ap)
+        if c.autoProduce:  c.producer.request(ap)
+    #---------------------------------------------
+    @classmethod
+    def showPreview(c, ap):
+        '''Redraw the preview pane from ap's geometry'''
+        if c.preview is None: return
+        t0 = time.perf_counter()
+        try:
+            shapes = ap.previewShapes()
+        except (ValueError, ZeroDivisionError, FloatingPointError):
+            shapes = []
+        c.preview.setShapes(shapes, (time.perf_counter()-t0)*1000)
+    #---------------------------------------------
+    @classmethod
+    def showCheck(c, ap):
+        '''Flag problems with assembly ap, before any Produce of it'''
+        if c.checkLabel is None: return
+        probs = ap.check()
+        c.checkLabel.setText('Invalid: ' + '; '.join(probs) if probs else '')
+    #---------------------------------------------
+    @classmethod
+    def explore(c, base):
+        '''Show a grid of variants of base's design, to pick from'''
+        if c.exploreWin is None:
+            from previewpane import ExploreWindow
+            c.exploreWin = ExploreWindow('gear2', base.spinboxes, ('n', 'p'), step=1)
+        c.exploreWin.show()
+        c.exploreWin.raise_()
     #---------------------------------------------
     @classmethod
     def on_buttonClick(c, bu, bun):
@@ -62,130 +94,58 @@ class CallData:
         '''
         bt = c.buttonLabels()[bun]
         if   bt=='Quit':      sys.exit()
-        elif bt=='Produce':   produceOutput(bu.parentWidget().armParam)
+        elif bt=='Produce':   c.producer.request(bu.parentWidget().armParam, now=True)
         elif bt=='AutoProd':
             c.autoProduce = not c.autoProduce
             color = 'green' if c.autoProduce else 'khaki'
             bu.setStyleSheet('QPushButton {background-color: %s;}'%color)
+        elif bt=='Explore':   c.explore(bu.parentWidget())
+        elif bt=='Profile':     # Toggle cProfile capture, and stats
+            prodstats.profiling = not prodstats.profiling
+            prodstats.enabled = prodstats.enabled or prodstats.profiling
+            color = 'green' if prodstats.profiling else 'khaki'
+            bu.setStyleSheet('QPushButton {background-color: %s;}'%color)
         else:
             print ('B{} {} {} click'.format(bun, bt, bu.text()))
 #---------------------------------------------
-class GearAssembly:
-    '''Class for Gear Assembly data.  Data items include:
-    a, Pressure angle, degrees
-    m, Module, pitch diam/pi, mm*10
-    g, Gear Thickness, mm*10, eg 26 -> 2.6 mm thick
-    h, Center hole diameter, mm*10
-    s, Sun gear tooth count
-    t, Planet gear tooth count
-    n, Number of planets
-    '''        
-    def __init__(self, a,g,h,m,n,p,s):
-        self.ready = False
-        self.a = a
-        self.g = g
-        self.h = h
-        self.m = m
-        self.n = n
-        self.p = p
-        self.s = s
-
-    def makeAssembly(self):
-        sun = Gear(self.s, 0, self)
-        asm = sun.makeGear(None, self)
-        for i in range(self.n):
-            plan = Gear(self.p, 1+i, self)
-            asm += plan.makeGear(sun, self)
-        return asm
-    
-#---------------------------------------------
-class Gear:
-    '''Class for one gear, including diameters and static mesh angles.
-    The sun gear of an assembly has tooth 0 at mesh angle 0.  The kth
-    planet of n planets has a mesh angle 180+fm(s,p,360*k/n), where s
-    and p are sun and planet tooth counts, and fm is a function
-    placing planet tooth 0 next to sun tooth [s*k/n] such that teeth
-    mesh rather than clash.
-
-    Gears have several diameters that are relevant, principally root,
-    pitch, and tip diameters.  Drawings should show pitch circles of
-    two meshing gears as tangent, their root circles separated by 2.5
-    times the module, and their tip circles overlapped by twice the
-    module.  At the pitch circle, tooth-to-tooth distance equals the
-    module.  Hence, pitch circle circumference is an integer multiple
-    of module.    '''
-        
-    def __init__(self, nT, pN, ap):
-        '''Compute diameters and offsets for one gear.  It has nT teeth.  It
-        is planet number pN if pN > 0, else it is the sun gear of an
-        assembly.  Other data is in ap,
-        a GearAssembly object.
-        '''
-        modul, sT, pT, nplanets = ap.m/10.0, ap.s, ap.p, ap.n
-         # Compute pitch diameter from tooth count and module
-        self.pd = nT * modul    # Gear pitch diameter, pd
-        self.nT = nT
-        # Compute root and tip diameters - per following:
-        # https://khkgears.net/new/gear_knowledge/abcs_of_gears-b/basic_gear_terminology_calculation.html
-        self.td = self.pd + 2  *modul # Gear tip diameter,  td
-        self.rd = self.pd - 2.5*modul # Gear root diameter, rd
-        loca = self.loca = (2*pi*(pN%nplanets))/nplanets # Line of centers angle, radians
-        self.sma = 0
-        def d(a): return a*180/pi
-        if pN > 0:
-            pDel = 2*pi/pT           # Angle between planet teeth
-            sDel = 2*pi/sT           # Angle between sun teeth
-            k = int(loca/sDel)       # Number of sun teeth to skip
-            ta = k*sDel + sDel/2     # target angle
-            self.sma = ta + pi if ta < pi else ta - pi
-            print ('d {:6.2f}   k {:2}   kd {:6.2f}   la {:6.2f}   sa {:7.2f} e {:7.2f}'.format(d(sDel), k, d(k*sDel), d(loca), d(self.sma), self.sma/sDel))
-        
-    def makeGear(self, sg, ap):
-        '''Produce CSG for one gear.  Parameter sg is None if this will be a
-        sun gear, else is the sun Gear object.  Other data is in ap, a
-        GearAssembly object.        '''
-        hh, h0, h1, h2, h3 = 0.1, 1, 1.1, 1.2, 1.3
-        nT, tLen, tRad = self.nT, (self.td-self.rd)*.3, self.rd/2
-        asm  = cylinder(d=self.rd, h=h2)
-        for i in range(nT):
-            tAngle = self.sma + 2*i*pi/nT
-            c = rotate(tAngle*180/pi)(cube([tLen, tLen/(6+i), h2]))
-            dx, dy = tRad*cos(tAngle), tRad*sin(tAngle)
-            asm += translate([dx, dy, 0])(c)
-        asm = color(Black)(asm) + color(Magenta)(cylinder(d=self.pd, h=h1))
-        centerHole = down(hh)(cylinder(d=ap.h/10, h=h3))
-        asm = (asm + color(Green)(cylinder(d=self.td, h=h0))) - centerHole
-        if sg:
-            cDist = (sg.pd + self.pd)/2
-            self.cx, self.cy = cDist*cos(self.loca), cDist*sin(self.loca)
-            return translate([self.cx, self.cy, 0])(asm)
-        else:
-            self.cx, self.cy = 0, 0
-            return asm    
-#---------------------------------------------
-# ref: "Public Domain
-# in here, adapt some of the code from:
-# Parametric Involute Spur Gear (and involute helical gear and
-# involute rack) version 1.1 by Leemon Baird, 2011, Leemon@Leemon.com
-
-
-#---------------------------------------------
-def produceOutput(ap):
+def produceOutput(ap, draft=False):
+    '''Write .scad code for ap; coarse if draft, else full quality.'''
     if not ap.ready: return
-    asm = ap.makeAssembly()
-    cylSegments, version, title = 90, 1, 'gear'
-    cylSet_fn = '$fn = {};'.format(cylSegments)
+    ap.lod = DRAFT if draft else FINAL
+    version, title = 1, 'gear'
+    cylSet_fn = '$fn = {};'.format(ap.lod.hdrSegs)
     asmFile = '{}{}.scad'.format(title, version)
-    scad_render_to_file(asm, asmFile, file_header=cylSet_fn, include_orig_code=False)
-    print ('Wrote scad code to {}'.format(asmFile))
+    params = {k: getattr(ap, k) for k in ('a','g','h','m','n','p','s','instanced')}
+    key = prodcache.key('gear2', params, ap.lod.name) if prodcache.enabled else None
+    with ProduceStats('gear2') as st:
+        with st.stage('cache'):  wrote = prodcache.fetch(key, asmFile) if key else None
+        if wrote is None:       # Not cached; make it
+            with st.stage('build'):  asm = ap.makeAssembly()
+            with st.stage('write'):  wrote = writeScad(asmFile, asm, cylSet_fn)
+            if key: prodcache.store(key, asmFile)
+            if prodstats.enabled:
+                ci = gearCacheInfo()['subtrees']
+                st.note(nodes=countNodes(asm), bytes=os.path.getsize(asmFile), wrote=wrote, lod=ap.lod.name,
+                        cacheHits=ci.hits, cacheMisses=ci.misses)
+        elif prodstats.enabled:
+            st.note(cached=True, bytes=os.path.getsize(asmFile), wrote=wrote, lod=ap.lod.name)
+    if wrote:
+        print ('Wrote {} scad code to {}'.format(ap.lod.name, asmFile))
+    else:
+        print ('No change to {}'.format(asmFile))
 #---------------------------------------------
 if __name__ == '__main__':
+    from PyQt5.QtWidgets import QGridLayout, QSpinBox, QLabel
+    from PyQt5.QtWidgets import QApplication, QWidget, QPushButton
+    from PyQt5.QtCore import QTimer
+    from previewpane import PreviewPane
     app = QApplication(sys.argv)    # Create a Qt application, first thing
     widget = QWidget()
     widget.setWindowTitle('Some design')
     widget.setStyleSheet('QGridLayout {background-color: khaki; color: lightcyan}')
     widget.setStyleSheet('QPushButton {background-color: khaki;}')
     panes = QGridLayout(widget)
+    CallData.producer = AutoProducer(produceOutput)
     a,g,h,m,n,p,s  = 20, 25, 31, 23, 5, 7, 13
     aarm = GearAssembly(a,g,h,m,n,p,s)
     # Make pushbuttons
@@ -195,10 +155,9 @@ if __name__ == '__main__':
         bu = QPushButton(txt)
         panes.addWidget(bu, 0, k) # Button in row 0, column k
         bu.clicked.connect(CallData.makeClickFunc(bu, k))
-        if txt=='AutoProd':
-            CallData.on_buttonClick(bu, k) # Toggle AutoProd on
 
     widget.armParam = aarm      # Produce needs a link to aarm
+    widget.spinboxes = {}       # Explore needs the spinboxes, by name
     slo, shi = 0, 999
     spinsets = [
         # Range; Initial Value; VarName; and Legend for each spinbox
@@ -217,6 +176,7 @@ if __name__ == '__main__':
         sb.valueChanged.connect(CallData.makeSpinBoxFunc(widget, sb, sn))
         sb.setRange(rlo, rhi)
         sb.setValue(rini)
+        widget.spinboxes[varn] = sb
         # Add legend, spinbox, and var name widgets into QGridLayout
         # Starting at cell (ro,0), use 1 row, 2 cols for legend
         panes.addWidget(QLabel(legend), ro, 0, 1, 2)
@@ -224,6 +184,25 @@ if __name__ == '__main__':
         panes.addWidget(QLabel(varn),   ro, 3) # var-name in cell (ro,3)
         ro += 1
 
+    # Status line, showing stage timings of the latest Produce
+    status = QLabel('')
+    panes.addWidget(status, ro, 0, 1, 4)
+    def showStats():
+        if prodstats.last != status.text(): status.setText(prodstats.last)
+    statsTimer = QTimer()
+    statsTimer.timeout.connect(showStats)
+    statsTimer.start(250)
+    ro += 1
+    CallData.checkLabel = QLabel('')
+    CallData.checkLabel.setStyleSheet('QLabel {color: red;}')
+    panes.addWidget(CallData.checkLabel, ro, 0, 1, 4)
+    CallData.showCheck(aarm)
+
+    # Preview pane, at the bottom
+    CallData.preview = PreviewPane()
+    panes.addWidget(CallData.preview, ro+1, 0, 1, 4)
+    CallData.showPreview(aarm)
+
     aarm.ready = True           # Now allow Produce to occur
     widget.show()               # Show the window
     app.exec_()                 # Run the app
@@ -0,0 +1,562 @@
+# gearcore.py, the geometry behind the gear and leg scripts, with no
+# GUI: GearParams (gear1.py), GearAssembly and Gear (gear2.py), and
+# ArmParams (spinboxLegs.py), with involute profiles from tooth.py.
+# Importing this loads no Qt, and no SolidPython either; methods that
+# build SolidPython objects import it when first called.  So scripts
+# and batch jobs that only compute geometry start quickly and need no
+# display.  The GUI scripts are thin shells over these classes.
+
+from math import sqrt, pi, sin, cos, atan2
+from functools import lru_cache
+import numpy as np
+from tooth import gearProfile
+
+#---------------------------------------------
+class LOD:
+    '''Level of detail for output.  Circles get about one facet per
+    segLen mm of circumference, but at least minSegs and at most
+    maxSegs facets.  Gear teeth get nradii involute points per side,
+    and analytic leg arcs get chords within tol of the arcs.  hdrSegs
+    is the $fn set in .scad file headers, for anything else round.  '''
+    def __init__(self, name, minSegs, maxSegs, segLen, nradii, tol, hdrSegs):
+        self.name, self.minSegs, self.maxSegs, self.segLen = name, minSegs, maxSegs, segLen
+        self.nradii, self.tol, self.hdrSegs = nradii, tol, hdrSegs
+
+    def fn(self, d):
+        '''Return the number of facets for a circle of diameter d.'''
+        return int(min(self.maxSegs, max(self.minSegs, np.ceil(pi*abs(d)/self.segLen))))
+
+# Coarse output for while values are changing, and full quality
+DRAFT = LOD('draft', 8, 36, 3.0, 3, 0.2, 24)
+FINAL = LOD('final', 24, 180, 0.5, 6, 0.01, 90)
+lods = {l.name: l for l in (DRAFT, FINAL)}
+
+def segments(lod, d):
+    '''Return facets for a circle of diameter d at level of detail lod,
+    or None (leaving it to $fn) if lod is None.  '''
+    return lod.fn(d) if lod else None
+
+# previewShapes() methods return geometry for drawing, without Qt, as
+# a list of (kind, data, color) tuples, in OpenSCAD coordinates:
+#   ('poly', n x 2 array, color)     closed outline
+#   ('circle', (x, y, r), color)
+#   ('point', (x, y), color)
+def placedOutline(pts, angle, x, y):
+    '''Return outline pts rotated by angle (radians) and moved to (x, y).'''
+    c, s = cos(angle), sin(angle)
+    return pts @ np.array([[c, s], [-s, c]]) + (x, y)
+
+#---------------------------------------------
+class GearParams:
+    '''Class for gear assembly data.  Data items include:
+    p, Pressure angle, degrees
+    s, Module, mm 
+    t, Thickness, mm
+    q, Center gear tooth count
+    u, Planet gear tooth count
+    w, Number of planets
+    [v0 only draws the center gear]
+
+    Gears have several diameters that are relevant, principally root,
+    pitch, and tip diameters.  Drawings should show pitch circles of
+    two meshing gears as tangent, their root circles separated by 2.5
+    times the module, and their tip circles overlapped by twice the
+    module.  At the pitch circle, tooth-to-tooth distance equals the
+    module.  Hence, pitch circle circumference is an integer multiple
+    of module.
+
+    lod, if not None, is an LOD giving circle facets by size.
+    '''
+        
+    def __init__(self, p,q,s,t,u,w):
+        self.ready = False
+        self.lod = None
+        self.p = p
+        self.q = q
+        self.s = s
+        self.t = t
+        self.u = u
+        self.w = w
+        #print ('p {}  q {}  s {}  t {}  u {}  w {}'.format(p,q,s,t,u,w))
+
+    # Diameters follow q and s, which the GUI changes in place.
+    # Compute center-gear pitch diameter from tooth count, and root
+    # and tip diameters - per following:
+    # https://khkgears.net/new/gear_knowledge/abcs_of_gears-b/basic_gear_terminology_calculation.html
+    @property
+    def cdp(self): return (self.q * self.s)/pi  # Pitch diameter
+    @property
+    def dt(self): return self.cdp + 2  *self.s  # Gear tip diameter
+    @property
+    def dr(self): return self.cdp - 2.5*self.s  # Gear root diameter
+
+    def makeGear(self):
+        from solid import color, cylinder
+        from solid.utils import Black, Green, Magenta
+        print ('Make gear')
+        lod = self.lod
+        ccdr = color(Black)(cylinder(d=self.dr, h=1.2, segments=segments(lod, self.dr)))
+        ccdp = color(Magenta)(cylinder(d=self.cdp, h=1.1, segments=segments(lod, self.cdp)))
+        cctp = color(Green)(cylinder(d=self.dt, h=1.0, segments=segments(lod, self.dt)))
+        return ccdr+ccdp+cctp
+
+    def previewShapes(self):
+        '''Return preview shapes: involute outline, and root, pitch,
+        and tip circles.  '''
+        shapes = []
+        if self.q >= 3 and self.s > 0:
+            prof = gearProfile(self.q, self.s/pi, self.p)   # Module, as cdp implies
+            shapes.append(('poly', prof, 'darkCyan'))
+        return shapes + [('circle', (0, 0, self.dr/2), 'black'),
+                         ('circle', (0, 0, self.cdp/2), 'magenta'),
+                         ('circle', (0, 0, self.dt/2), 'green')]
+#---------------------------------------------
+def planetMeshAngle(s, p, loca):
+    '''Return the mesh angle (radians, 0 to 2pi) of tooth 0 of a planet
+    of p teeth whose line of centers with a sun of s teeth (tooth 0 at
+    angle 0) is at angle loca, so that at the line of centers a planet
+    gap meets a sun tooth.  Arguments may be arrays.  '''
+    sDel, pDel = 2*pi/s, 2*pi/p         # Angles between sun, planet teeth
+    fs = np.mod(-loca/sDel, 1)          # Sun tooth offset from line, pitches
+    return np.mod(loca + pi + np.mod(0.5 - fs, 1)*pDel, 2*pi)
+
+def checkPlanetary(s, p, n, m=1.0, h=0.0, clear=0.0, phaseTol=0.02):
+    '''Check planetary assemblies of a sun of s teeth and n planets of p
+    teeth, module m mm, center holes of diameter h mm.  Arguments may
+    be arrays of any broadcast-compatible shapes.  Return a dict of
+    arrays of that shape:
+      clearance: gap (mm) between tip circles of adjacent planets
+      tipClear:  clearance > clear, or n < 2
+      holeFits:  center hole is inside the root circles of both gears
+      ringErr:   worst tooth phase error, as a fraction of a tooth
+                 pitch, of any planet's mesh with a ring gear of s+2p
+                 teeth turned to mesh with planet 0
+      ring:      ringErr <= phaseTol; ie the ring could go on
+      ok:        tipClear and holeFits both true
+    Planets mesh with the sun by construction: Gear turns each to
+    planetMeshAngle.  The ring has no such freedom once planet 0 fixes
+    it, so ringErr comes from the tooth angles of the sun, the planets
+    as Gear turns them, and the ring, at each planet's line of
+    centers.  Where a ring tooth is f ring pitches past the line and
+    a planet tooth is g planet pitches past it (both counterclockwise,
+    at the pitch point), the mesh holds iff f - g is half a pitch.
+    ring isn't part of ok, since assemblies here have no ring gear.  '''
+    s, p, n, m, h = [np.asarray(v, dtype=float) for v in (s, p, n, m, h)]
+    shape = np.broadcast(s, p, n, m, h).shape
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cDist = (s + p)*m/2             # Sun-planet center distance
+        clearance = 2*cDist*np.sin(pi/np.maximum(n, 1)) - (p + 2)*m
+        tipClear = (n < 2) | (clearance > clear)
+        holeFits = (h < (s - 2.5)*m) & (h < (p - 2.5)*m)
+        # Ring and planet tooth offsets at the outer pitch points, for
+        # planets 0 to n-1, with ring tooth 0 at angle 0; these depend
+        # on s, p, and n only, so skip the other axes
+        rs, rp, rn = [v.reshape(-1,1) for v in np.broadcast_arrays(s, p, n)]
+        k = np.arange(max(1, int(np.max(rn, initial=1))))
+        loca = 2*pi*k/np.maximum(rn, 1)
+        sma = planetMeshAngle(rs, rp, loca)
+        d = -loca*(rs + 2*rp)/(2*pi) - (sma - loca)*rp/(2*pi)
+        err = np.abs(np.mod(d - d[:,:1] + 0.5, 1) - 0.5)    # Ring turned to fit planet 0
+        ringErr = np.max(np.where(k < rn, err, 0), axis=1).reshape(np.broadcast(s, p, n).shape)
+    res = {'clearance': clearance, 'tipClear': tipClear, 'holeFits': holeFits,
+           'ringErr': ringErr, 'ring': ringErr <= phaseTol}
+    res['ok'] = tipClear & holeFits & (n >= 1) & (s > 0) & (p > 0)
+    return {key: np.broadcast_to(v, shape) for key, v in res.items()}
+
+#---------------------------------------------
+class GearAssembly:
+    '''Class for Gear Assembly data.  Data items include:
+    a, Pressure angle, degrees
+    m, Module, pitch diam/pi, mm*10
+    g, Gear Thickness, mm*10, eg 26 -> 2.6 mm thick
+    h, Center hole diameter, mm*10
+    s, Sun gear tooth count
+    t, Planet gear tooth count
+    n, Number of planets
+    If instanced is true, each gear's teeth are written as one tooth
+    module plus a for/rotate loop, instead of one node per tooth.
+    lod, if not None, is an LOD giving circle facets by size.
+    '''        
+    def __init__(self, a,g,h,m,n,p,s):
+        self.ready = False
+        self.instanced = False
+        self.lod = None
+        self.a = a
+        self.g = g
+        self.h = h
+        self.m = m
+        self.n = n
+        self.p = p
+        self.s = s
+
+    def check(self):
+        '''Return a list of problems with this assembly, from
+        checkPlanetary; an empty list if none.  '''
+        modul = self.m/10.0
+        if self.n < 1 or self.s < 1 or self.p < 1 or modul <= 0:
+            return ['need n, p, s, and m all positive']
+        c = checkPlanetary(self.s, self.p, self.n, modul, self.h/10.0)
+        probs = []
+        if not c['tipClear']:
+            probs.append('planets overlap by {:.2f} mm'.format(-float(c['clearance'])))
+        if not c['holeFits']:
+            probs.append('center hole too big')
+        return probs
+
+    def previewShapes(self):
+        '''Return preview shapes: involute outlines of sun and planets
+        at their mesh angles, their root, pitch, and tip circles, and
+        center holes.  '''
+        if self.n < 1 or self.s < 3 or self.p < 3 or self.m <= 0:
+            return []
+        modul = self.m/10.0
+        spd = gearSizes(self.s, self.m)[0]
+        gears = [(self.s, 0, 0, 0)]
+        for k in range(1, self.n+1):
+            loca = 2*pi*(k % self.n)/self.n
+            cDist = (spd + gearSizes(self.p, self.m)[0])/2
+            gears.append((self.p, float(planetMeshAngle(self.s, self.p, loca)),
+                          cDist*cos(loca), cDist*sin(loca)))
+        shapes = []
+        for nT, sma, x, y in gears:
+            pd, td, rd = gearSizes(nT, self.m)
+            shapes += [('poly', placedOutline(gearProfile(nT, modul, self.a), sma, x, y), 'darkCyan'),
+                       ('circle', (x, y, rd/2), 'black'), ('circle', (x, y, pd/2), 'magenta'),
+                       ('circle', (x, y, td/2), 'green'), ('circle', (x, y, self.h/20), 'black')]
+        return shapes
+
+    def makeAssembly(self):
+        from scadtools import unionOf
+        sun = Gear(self.s, 0, self)
+        gears = [sun.makeGear(None, self)]
+        for i in range(self.n):
+            plan = Gear(self.p, 1+i, self)
+            gears.append(plan.makeGear(sun, self))
+        return unionOf(gears)
+    
+#---------------------------------------------
+class Gear:
+    '''Class for one gear, including diameters and static mesh angles.
+    The sun gear of an assembly has tooth 0 at mesh angle 0.  The kth
+    planet of n planets has a mesh angle planetMeshAngle(s,p,2pi*k/n),
+    where s and p are sun and planet tooth counts, placing planet
+    teeth such that they mesh with sun teeth rather than clash.
+
+    Gears have several diameters that are relevant, principally root,
+    pitch, and tip diameters.  Drawings should show pitch circles of
+    two meshing gears as tangent, their root circles separated by 2.5
+    times the module, and their tip circles overlapped by twice the
+    module.  At the pitch circle, tooth-to-tooth distance equals the
+    module.  Hence, pitch circle circumference is an integer multiple
+    of module.    '''
+        
+    def __init__(self, nT, pN, ap):
+        '''Compute diameters and offsets for one gear.  It has nT teeth.  It
+        is planet number pN if pN > 0, else it is the sun gear of an
+        assembly.  Other data is in ap,
+        a GearAssembly object.
+        '''
+        sT, pT, nplanets = ap.s, ap.p, ap.n
+        self.nT = nT
+        self.pd, self.td, self.rd = gearSizes(nT, ap.m)
+        loca = self.loca = (2*pi*(pN%nplanets))/nplanets # Line of centers angle, radians
+        self.sma = 0
+        def d(a): return a*180/pi
+        if pN > 0:
+            sDel = 2*pi/sT           # Angle between sun teeth
+            k = int(loca/sDel)       # Number of sun teeth to skip
+            self.sma = float(planetMeshAngle(sT, pT, loca))
+            print ('d {:6.2f}   k {:2}   kd {:6.2f}   la {:6.2f}   sa {:7.2f} e {:7.2f}'.format(d(sDel), k, d(k*sDel), d(loca), d(self.sma), self.sma/sDel))
+        
+    def makeGear(self, sg, ap):
+        '''Produce CSG for one gear.  Parameter sg is None if this will be a
+        sun gear, else is the sun Gear object.  Other data is in ap, a
+        GearAssembly object.  The unrotated, untranslated gear comes
+        from gearSubtree, so gears of the same size share one subtree.  '''
+        from solid import rotate, translate
+        asm = gearSubtree(self.nT, ap.m, ap.h, ap.lod, ap.instanced)
+        if self.sma:
+            asm = rotate(self.sma*180/pi)(asm)
+        if sg:
+            cDist = (sg.pd + self.pd)/2
+            self.cx, self.cy = cDist*cos(self.loca), cDist*sin(self.loca)
+            return translate([self.cx, self.cy, 0])(asm)
+        else:
+            self.cx, self.cy = 0, 0
+            return asm    
+
+#---------------------------------------------
+# Gears are memoized on just the parameters they depend on, so that,
+# eg, changing the planet count n rebuilds no gear, and planets all
+# share one subtree.  Cached subtrees are shared; don't modify them.
+@lru_cache(maxsize=256)
+def gearSizes(nT, m):
+    '''Return pitch, tip, and root diameters of a gear of nT teeth and
+    module m (in mm*10, as in GearAssembly).  '''
+    modul = m/10.0
+    # Compute pitch diameter from tooth count and module, and root
+    # and tip diameters - per following:
+    # https://khkgears.net/new/gear_knowledge/abcs_of_gears-b/basic_gear_terminology_calculation.html
+    pd = nT * modul             # Gear pitch diameter, pd
+    return pd, pd + 2*modul, pd - 2.5*modul  # and tip, root diameters
+
+@lru_cache(maxsize=64)
+def gearSubtree(nT, m, h, lod, instanced):
+    '''Return CSG for a gear of nT teeth, module m and center hole h
+    (mm*10), with tooth 0 at angle 0, centered at the origin.  '''
+    from solid import color, cube, cylinder, rotate, translate
+    from solid.utils import down, Black, Green, Magenta
+    from scadtools import ringOf, unionOf
+    pd, td, rd = gearSizes(nT, m)
+    hh, h0, h1, h2, h3 = 0.1, 1, 1.1, 1.2, 1.3
+    tLen, tRad = (td-rd)*.3, rd/2
+    parts = [cylinder(d=rd, h=h2, segments=segments(lod, rd))]
+    if instanced:               # Write one tooth, and a loop placing it
+        tooth = 'translate([{:.10f}, 0, 0]) cube([{:.10f}, {:.10f}/(6+i), {}]);'.format(tRad, tLen, tLen, h2)
+        parts.append(ringOf(tooth, nT, prefix='tooth'))
+    else:
+        for i in range(nT):
+            tAngle = 2*i*pi/nT
+            c = rotate(tAngle*180/pi)(cube([tLen, tLen/(6+i), h2]))
+            dx, dy = tRad*cos(tAngle), tRad*sin(tAngle)
+            parts.append(translate([dx, dy, 0])(c))
+    asm = unionOf([color(Black)(unionOf(parts)),
+                   color(Magenta)(cylinder(d=pd, h=h1, segments=segments(lod, pd))),
+                   color(Green)(cylinder(d=td, h=h0, segments=segments(lod, td)))])
+    centerHole = down(hh)(cylinder(d=h/10, h=h3, segments=segments(lod, h/10)))
+    return asm - centerHole
+
+def gearCacheInfo():
+    '''Return cache_info() tuples (hits, misses, maxsize, currsize) of
+    the gear size and gear subtree caches, as a dict.  '''
+    return {'sizes': gearSizes.cache_info(), 'subtrees': gearSubtree.cache_info()}
+
+def clearGearCache():
+    '''Empty the gear caches and reset their hit/miss counters.'''
+    gearSizes.cache_clear()
+    gearSubtree.cache_clear()
+
+#---------------------------------------------
+# ref: "Public Domain
+# in here, adapt some of the code from:
+# Parametric Involute Spur Gear (and involute helical gear and
+# involute rack) version 1.1 by Leemon Baird, 2011, Leemon@Leemon.com
+
+#---------------------------------------------
+class ArmParams:
+    '''Class with data and methods to make an oval arm.
+
+    Let C(r,x,y) be a circle of radius r with center (x,y).  In this
+    program, an oval Arm has parameters p > q > 0 > s > t and u > 0 > w
+    and is bounded by arcs of four circles: an upper arc of C(p-s, 0,
+    p); a lower arc of C(q-t, 0, t); a left arc of C(rl, w, vl); and a
+    right arc of C(rr, u, vr), with rr, rl, vr, vl such that the small
+    circles are tangent to the lens intersection of the large circles.
+
+    If analytic is true, getOblongArm returns the arm as one polygon
+    following the four arcs, each sampled finely enough that chords
+    stray at most tol from the arc, rather than as a CSG combination
+    of cylinders and cubes.  lod, if not None, is an LOD giving circle
+    facets by size, and overriding tol.
+    '''
+    def __init__(self, p,q,s,t,u,w):
+        self.ready = False
+        self.analytic = False
+        self.tol = 0.01
+        self.lod = None
+        self.p = p
+        self.q = q
+        self.s = s
+        self.t = t
+        self.u = u
+        self.w = w
+        #print ('p {}  q {}  s {}  t {}  u {}  w {}'.format(p,q,s,t,u,w))
+
+    def solveArcArc(self, p,q,s,t,u):
+        '''Solve for a circle R tangent to two arcs C1 and C2.  Return radius,
+        v, tphi, tplo, ie, the radius of R, its center y coordinate, and
+        two tangency points, tp hi and tp lo.
+
+        The arcs are portions of circles with radii r1 = p-s and r2 =
+        q-t, with centers at (0,p) and (0,t) respectively, while
+        circle R has radius r and center (u,v).  We are given p, q, s,
+        t, u with p > q > 0 > s > t.  r and v are unknowns.  Method:
+        Let radii from (0,p) and (0,t) intersect at (u,v).  Let a and
+        b be the lengths of the radii left over after intersection.
+        So a = r1 - sqrt(u^2+(p-v)^2) and b = r2 - sqrt(u^2+(t-v)^2).
+        We want r = a(v0) = b(v0).  We solve using Newton iteration.
+        Note, if f(v) = c - sqrt(u^2+(d-v)^2), then f'(v) =
+        (v-d)/sqrt(u^2+(d-v)^2). Note, closed-form non-iterative
+        solutions exist but are complicated. Ref: (using p,s,t
+        differently) <https://math.stackexchange.com/q/3145832>
+        '''
+        r1, r2, uu = p-s, q-t, u*u
+        r1s, r2s = r1**2, r2**2
+        # Make initial estimate of v, halfway between y1(u) and y2(u)
+        if r1s<uu or r2s<uu: return 5,0 # u too big means no solution
+        y1u, y2u = p - sqrt(r1s-uu), t + sqrt(r2s-uu)
+        v = (y1u+y2u)/2
+        for i in range(9):     # Usually takes about 3 iterations
+            av = sqrt(uu+(p-v)**2);  ar=r1-av;  adf=(v-p)/av
+            bv = sqrt(uu+(t-v)**2);  br=r2-bv;  bdf=(v-t)/bv
+            if abs(adf-bdf) < 1e-5: break # Avoid div by 0
+            v = v + (ar-br)/(adf-bdf)
+            if abs(ar-br) < 1e-12: break
+        # Compute intersection points by similar triangles
+        r = ar; n1, n2 = r1/(r1-r), r2/(r2-r)
+        tphi = (u*n1, p-(p-v)*n1)
+        tplo = (u*n2, t+(v-t)*n2)
+        return ar, v, tphi, tplo
+
+    def solveArcArcGrad(self, p,q,s,t,u):
+        '''Return r, v, dr, dv: radius and center y coordinate of circle
+        R, as from solveArcArc, and their gradients, as arrays of
+        derivatives with respect to p, q, s, t, u.  Raise ValueError if
+        there is no solution.
+
+        The gradients come from the implicit function theorem applied
+        to the tangency conditions F = (A-(p-s-r), B-(q-t-r)) = 0,
+        where A and B are the distances from (u,v) to (0,p) and (0,t):
+        d(r,v) = -inv(dF/d(r,v)) dF/d(p,q,s,t,u).        '''
+        sol = self.solveArcArc(p,q,s,t,u)
+        if len(sol) < 4:
+            raise ValueError('no circle at {} tangent to both arcs'.format(u))
+        r, v = sol[:2]
+        A, B = sqrt(u*u+(p-v)**2), sqrt(u*u+(t-v)**2)
+        Frv = np.array([[1, (v-p)/A], [1, (v-t)/B]])
+        Fprm = np.array([[(p-v)/A - 1, 0, 1, 0, u/A],
+                         [0, -1, 0, (t-v)/B + 1, u/B]])
+        d = -np.linalg.solve(Frv, Fprm)
+        return r, v, d[0], d[1]
+
+    @staticmethod
+    def solveArcArcArray(p,q,s,t,u):
+        '''Array version of solveArcArc: solve for circles R tangent to arcs
+        C1 and C2 for many parameter sets at once.  p,q,s,t,u are
+        arrays (or scalars) that broadcast together.  Return r, v,
+        tphi, tplo, ok: arrays of radii and center y coordinates,
+        n x 2 arrays of tangency points, and a mask that is False
+        where u is too big for a solution.  Like solveArcArc's
+        return 5,0, such entries get r=5 and v=0, with NaN tangency
+        points.  Each entry stops iterating when solveArcArc would,
+        so results match it.        '''
+        p,q,s,t,u = np.broadcast_arrays(*[np.asarray(a, dtype=float) for a in (p,q,s,t,u)])
+        p,q,s,t,u = [a.ravel() for a in (p,q,s,t,u)]
+        r1, r2, uu = p-s, q-t, u*u
+        r1s, r2s = r1**2, r2**2
+        ok = (r1s >= uu) & (r2s >= uu)   # u too big means no solution
+        y1u = p - np.sqrt(np.where(ok, r1s-uu, 0))
+        y2u = t + np.sqrt(np.where(ok, r2s-uu, 0))
+        v = (y1u+y2u)/2
+        r = np.zeros_like(v)
+        live = ok.copy()                 # Entries still iterating
+        for i in range(9):     # Usually takes about 3 iterations
+            if not live.any(): break
+            vl, pl, tl, ul = v[live], p[live], t[live], uu[live]
+            av = np.sqrt(ul+(pl-vl)**2);  ar=r1[live]-av;  adf=(vl-pl)/av
+            bv = np.sqrt(ul+(tl-vl)**2);  br=r2[live]-bv;  bdf=(vl-tl)/bv
+            r[live] = ar
+            flat = np.abs(adf-bdf) < 1e-5 # Avoid div by 0
+            step = np.where(flat, 0, (ar-br)/np.where(flat, 1, adf-bdf))
+            v[live] = vl + step
+            live[live] = ~(flat | (np.abs(ar-br) < 1e-12))
+        # Compute intersection points by similar triangles
+        with np.errstate(divide='ignore', invalid='ignore'):
+            n1, n2 = r1/(r1-r), r2/(r2-r)
+            tphi = np.column_stack((u*n1, p-(p-v)*n1))
+            tplo = np.column_stack((u*n2, t+(v-t)*n2))
+        r[~ok], v[~ok] = 5, 0
+        tphi[~ok], tplo[~ok] = np.nan, np.nan
+        return r, v, tphi, tplo, ok
+
+    @staticmethod
+    def arcPoints(cx, cy, r, a0, a1, tol):
+        '''Return points on circle C(r,cx,cy), going counterclockwise from
+        angle a0 toward angle a1 (radians), excluding the a1 end.  Use
+        enough points that chords stray at most tol from the arc.   '''
+        span = (a1-a0) % (2*pi)
+        dmax = 2*np.arccos(1-tol/r) if tol < r else pi/2
+        a = a0 + span*np.arange(max(1, int(np.ceil(span/dmax))))/max(1, np.ceil(span/dmax))
+        return np.column_stack((cx + r*np.cos(a), cy + r*np.sin(a)))
+
+    def getArcs(self):
+        '''Return the four arcs bounding the arm, in solveArcArc
+        coordinates, as (center, radius, start point, end point)
+        tuples, going counterclockwise: right end from p1 up to p2, top
+        from p2 to p4, left end from p4 down to p3, and bottom from p3
+        to p1.  '''
+        p,q,s,t,u,w = self.p, self.q, self.s, self.t, self.u, self.w
+        rl, vl, p1, p2 = self.solveArcArc(p,q,s,t,u)
+        rr, vr, p3, p4 = self.solveArcArc(p,q,s,t,w)
+        return [((u,vl), rl, p1, p2), ((0,t), q-t, p2, p4),
+                ((w,vr), rr, p4, p3), ((0,p), p-s, p3, p1)]
+
+    def getArmOutline(self, tol=None):
+        '''Return an n x 2 array of points outlining the arm, in
+        OpenSCAD coordinates and counterclockwise order, computed
+        directly from the four arcs and their tangency points.  tol
+        defaults to self.lod.tol, or to self.tol if lod is None.   '''
+        if tol is None:
+            tol = self.lod.tol if self.lod else self.tol
+        def ang(c, pt): return atan2(pt[1]-c[1], pt[0]-c[0])
+        pts = np.concatenate([self.arcPoints(c[0], c[1], r, ang(c,a), ang(c,b), tol)
+                              for c, r, a, b in self.getArcs()])
+        # OpenSCAD y is negated; reverse the order to stay counterclockwise
+        return pts[::-1]*(1,-1)
+
+    def check(self):
+        '''Return a list of problems with these parameters; an empty
+        list if none.  '''
+        p,q,s,t,u,w = self.p, self.q, self.s, self.t, self.u, self.w
+        probs = []
+        if not p > q > 0 > s > t:
+            probs.append('need p > q > 0 > s > t')
+        if not u > 0 > w:
+            probs.append('need u > 0 > w')
+        for end, x in (('right', u), ('left', w)):
+            sol = self.solveArcArc(p,q,s,t,x)
+            if len(sol) < 4:
+                probs.append('{} end is outside the lens'.format(end))
+            elif not 0 < sol[0] < min(p-s, q-t):
+                probs.append('{} end circle has radius {:.2f}'.format(end, sol[0]))
+        return probs
+
+    def previewShapes(self):
+        '''Return preview shapes: the arm outline, the four circles its
+        arcs lie on, and their tangency points.  Return [] if the arcs
+        have no solution.  '''
+        p,q,s,t,u,w = self.p, self.q, self.s, self.t, self.u, self.w
+        try:
+            rl, vl, p1, p2 = self.solveArcArc(p,q,s,t,u)
+            rr, vr, p3, p4 = self.solveArcArc(p,q,s,t,w)
+            outline = self.getArmOutline()
+        except (ValueError, ZeroDivisionError):
+            return []
+        shapes = [('poly', outline, 'darkCyan'),
+                  ('circle', (0, -p, p-s), 'lightGray'), ('circle', (0, -t, q-t), 'lightGray'),
+                  ('circle', (u, -vl, rl), 'green'), ('circle', (w, -vr, rr), 'red')]
+        return shapes + [('point', (x, -y), 'blue') for x, y in (p1, p2, p3, p4)]
+
+    def getOblongArm(self):
+        '''Return a SolidPython object modeling an oblong arm (per specs in
+        ArmParams object) bounded by four arcs of circles.        '''
+        from solid import color, cube, cylinder, linear_extrude, polygon, translate
+        from solid.utils import back, Green, Red
+        if self.analytic:
+            return linear_extrude(1)(polygon(self.getArmOutline().tolist()))
+        eps =  0.01
+        p,q,s,t,u,w = self.p, self.q, self.s, self.t, self.u, self.w
+        r1, r2 = p-s, q-t
+        domis, chi, dhi = 2*max(r1,r2), 1.1, -0.05
+        lod = self.lod
+        arc1 = back(r1+s)(cylinder(r=r1, h=1, segments=segments(lod, 2*r1)))
+        arc2 = back(q-r2)(cylinder(r=r2, h=1, segments=segments(lod, 2*r2)))
+        rl, vl, p1, p2 = self.solveArcArc(p,q,s,t,u)
+        rr, vr, p3, p4 = self.solveArcArc(p,q,s,t,w)
+        rightcircle = color(Green)(translate([u,-vl,dhi])(cylinder(r=rl,h=chi,segments=segments(lod, 2*rl))))
+        leftcircle = color(Red) (translate([w,-vr,dhi])(cylinder(r=rr,h=chi,segments=segments(lod, 2*rr))))
+        yrhi, yrlo, ylhi, yllo = p1[1], p2[1], p3[1], p4[1]
+        xr, xl = min(p1[0], p2[0]), max(p3[0], p4[0])
+        dominol = translate([xl-domis,-yllo, dhi])(cube([domis,yllo-ylhi,chi]))
+        dominor = translate([xr,      -yrlo, dhi])(cube([domis,yrlo-yrhi,chi]))
+        return (arc1*arc2-dominol-dominor) + rightcircle + leftcircle
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+
+# legfit.py, inverse design of spinboxLegs arms: finds ArmParams
+# parameters p,q,s,t,u,w giving an arm of wanted overall length,
+# width, end radii, and/or area, rather than nudging spinboxes.
+
+# The measures of an arm, and their derivatives, are exact.  Length
+# is u-w plus the two end radii, and width is the lens thickness q-s.
+# The area is that of the quadrilateral of the four tangency points,
+# plus the circular segment between each arc and its chord.  The end
+# circles' radii and centers have derivatives from solveArcArcGrad;
+# the area's derivative sums, over the four arcs, the arc length
+# times the change of its circle's radius, plus the change of its
+# circle's center dotted with the integral of the outward normal
+# along the arc.  (The arc ends slide along the outline as the
+# tangency points move, which changes nothing to first order.)
+
+# The fit is a damped Gauss-Newton (Levenberg-Marquardt) loop over
+# free variables z, with q = exp(z1), p = q+exp(z0), s = -exp(z2),
+# t = s-exp(z3), u = X*f(z4), and w = -X*f(z5), where X is the x of
+# the lens tip and f(z) = 1/(1+exp(-z)).  So every step keeps
+# p > q > 0 > s > t and u > 0 > w, with both end circles inside the
+# lens.  With fewer targets than parameters, many arms fit; the one it
+# returns is the one its steps reach from the start, which can be far
+# from the start when the targets are far from the start's measures.
+
+# Usage: ./legfit.py [--start p,q,s,t,u,w] name=value ...
+# with names length, width, rightRadius, leftRadius, area; eg
+#   ./legfit.py length=150 width=40 area=4500
+
+import argparse, time
+from math import atan2, cos, sin, pi, sqrt
+import numpy as np
+from gearcore import ArmParams
+
+measureNames = ('length', 'width', 'rightRadius', 'leftRadius', 'area')
+defaultStart = (40, 10, -30, -100, 40, -20)
+
+#---------------------------------------------
+def legMeasures(prm, grad=False):
+    '''Return an array of the measures, in measureNames order, of the
+    arm with parameters prm = (p,q,s,t,u,w); with grad, return also
+    their 5 x 6 Jacobian.  Raise ValueError if an end circle has no
+    solution.  '''
+    p,q,s,t,u,w = prm
+    ap = ArmParams(*prm)
+    rr, vr, drr, dvr = ap.solveArcArcGrad(p,q,s,t,u)   # Right end, at u
+    rl, vl, drl, dvl = ap.solveArcArcGrad(p,q,s,t,w)   # Left end, at w
+    e = np.eye(6)
+    def at(d, k):               # Put a gradient wrt p,q,s,t,x in slots of p..w
+        return np.concatenate((d[:4], [d[4]*(k == 4), d[4]*(k == 5)]))
+    # Circles of the arcs, in counterclockwise order (as in getArmOutline,
+    # in solveArcArc coordinates), as (cx, cy, radius, dcx, dcy, dradius)
+    circs = [(u, vr, rr, e[4], at(dvr, 4), at(drr, 4)),
+             (0, t, q-t, 0*e[0], e[3], e[1]-e[3]),
+             (w, vl, rl, e[5], at(dvl, 5), at(drl, 5)),
+             (0, p, p-s, 0*e[0], e[0], e[0]-e[2])]
+    def touch(c, d):            # Tangency point of circle c inside circle d
+        k = d[2]/(d[2]-c[2])
+        return d[0] + (c[0]-d[0])*k, d[1] + (c[1]-d[1])*k
+    p1, p2 = touch(circs[0], circs[3]), touch(circs[0], circs[1])
+    p3, p4 = touch(circs[2], circs[3]), touch(circs[2], circs[1])
+    corners = [p1, p2, p4, p3]
+    area = 0.5*sum(a[0]*b[1] - b[0]*a[1] for a, b in zip(corners, corners[1:] + corners[:1]))
+    dArea = np.zeros(6)
+    for (cx, cy, R, dcx, dcy, dR), a, b in zip(circs, corners, corners[1:] + corners[:1]):
+        a0, a1 = atan2(a[1]-cy, a[0]-cx), atan2(b[1]-cy, b[0]-cx)
+        th = (a1 - a0) % (2*pi)
+        area += R*R/2*(th - sin(th))
+        dArea += dR*R*th + R*((sin(a1)-sin(a0))*dcx + (cos(a0)-cos(a1))*dcy)
+    m = np.array([u - w + rr + rl, q - s, rr, rl, area])
+    if not grad:
+        return m
+    J = np.array([e[4] - e[5] + at(drr, 4) + at(drl, 5), e[1] - e[2],
+                  at(drr, 4), at(drl, 5), dArea])
+    return m, J
+
+def lensTip(p,q,s,t):
+    '''Return X, dX: the x coordinate of the right tip of the lens of
+    circles C(p-s, 0,p) and C(q-t, 0,t), and its gradient with respect
+    to p,q,s,t.  '''
+    d, R1, R2 = p-t, p-s, q-t
+    dd, dR1, dR2 = np.array([1,0,0,-1]), np.array([1,0,-1,0]), np.array([0,1,0,-1])
+    a = (d*d + R1*R1 - R2*R2)/(2*d)  # From (0,p) to the line of the tips
+    X = sqrt(R1*R1 - a*a)
+    da = (d*dd + R1*dR1 - R2*dR2)/d - a*dd/d
+    return X, (R1*dR1 - a*da)/X
+
+def fromFree(z):
+    '''Return parameters (p,q,s,t,u,w) for free variables z, and their
+    6 x 6 Jacobian.  '''
+    x = np.exp(z[:4])
+    q, s = x[1], -x[2]
+    p, t = q + x[0], s - x[3]
+    D = np.zeros((6, 6))
+    D[0,0], D[0,1], D[1,1] = x[0], x[1], x[1]
+    D[2,2], D[3,2], D[3,3] = -x[2], -x[2], -x[3]
+    X, dX = lensTip(p,q,s,t)
+    dX = dX @ D[:4,:4]
+    f = 1/(1 + np.exp(-z[4:]))       # Ends' fractions of the way to the tips
+    D[4,:4], D[4,4] = f[0]*dX, X*f[0]*(1-f[0])
+    D[5,:4], D[5,5] = -f[1]*dX, -X*f[1]*(1-f[1])
+    return np.array([p, q, s, t, X*f[0], -X*f[1]]), D
+
+def toFree(prm):
+    '''Return free variables z for parameters prm, which must have
+    p > q > 0 > s > t and u > 0 > w, with both ends inside the lens.  '''
+    p,q,s,t,u,w = prm
+    if not (p > q > 0 > s > t and u > 0 > w):
+        raise ValueError('need p > q > 0 > s > t and u > 0 > w')
+    X = lensTip(p,q,s,t)[0]
+    if max(u, -w) >= X:
+        raise ValueError('ends must be within the lens, |x| < {:.4f}'.format(X))
+    f = np.array([u, -w])/X
+    return np.concatenate((np.log([p-q, q, -s, s-t]), np.log(f/(1-f))))
+
+#---------------------------------------------
+def fitLeg(targets, start=defaultStart, tol=1e-10, maxIter=100):
+    '''Return (params, info): the parameters (p,q,s,t,u,w), as floats,
+    of an arm whose measures best match targets, a dict of measure
+    name -> value, starting from start (p,q,s,t,u,w, with both ends
+    inside the lens).  info has iterations, ok
+    (True if every target was met within relative error sqrt(tol)),
+    err (largest relative error), measures (a dict), and ms.  '''
+    t0 = time.perf_counter()
+    try:
+        idx = [measureNames.index(k) for k in targets]
+    except ValueError:
+        raise ValueError('unknown target in {}; use {}'.format(sorted(targets), ', '.join(measureNames)))
+    goal = np.array([float(v) for v in targets.values()])
+    scale = np.maximum(np.abs(goal), 1e-6)
+    def residual(z, grad=False):
+        prm, D = fromFree(z)
+        if not grad:
+            return (legMeasures(prm)[idx] - goal)/scale
+        m, J = legMeasures(prm, True)
+        return (m[idx] - goal)/scale, (J[idx] @ D)/scale[:,None]
+    z, lam = toFree(start), 1e-3
+    res, Jz = residual(z, True)
+    cost = res @ res
+    steps = 0
+    while cost >= tol and steps < maxIter:
+        g, H = Jz.T @ res, Jz.T @ Jz
+        while lam < 1e12:
+            dz = -np.linalg.solve(H + lam*(np.diag(np.diag(H)) + np.eye(6)), g)
+            try:
+                r2 = residual(z + dz)
+            except ValueError:      # Numerically too near a lens tip
+                r2 = None
+            if r2 is not None and r2 @ r2 < cost:
+                break
+            lam *= 10
+        else:
+            break               # No downhill step; as good as it gets
+        z, lam, steps = z + dz, max(lam/3, 1e-9), steps + 1
+        res, Jz = residual(z, True)
+        cost, before = res @ res, cost
+        if cost > before*(1 - 1e-6):
+            break               # Stalled short of the targets
+    prm = tuple(float(v) for v in fromFree(z)[0])
+    m = legMeasures(prm)
+    err = float(np.max(np.abs(res))) if len(res) else 0.0
+    return prm, {'iterations': steps, 'ok': cost < tol, 'err': err,
+                 'measures': dict(zip(measureNames, m.tolist())),
+                 'ms': (time.perf_counter()-t0)*1000}
+
+#---------------------------------------------
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Find leg arm parameters for target measures.')
+    ap.add_argument('targets', nargs='+', help='name=value, names: ' + ', '.join(measureNames))
+    ap.add_argument('--start', default=','.join(map(str, defaultStart)),
+                    help='starting p,q,s,t,u,w (default %(default)s)')
+    args = ap.parse_args()
+    targets = {}
+    for nv in args.targets:
+        k, v = nv.split('=')
+        targets[k] = float(v)
+    prm, info = fitLeg(targets, [float(v) for v in args.start.split(',')])
+    print ('{} in {} iterations, {:.2f} ms; largest relative error {:.2g}'.format(
+        'Fit' if info['ok'] else 'Best fit', info['iterations'], info['ms'], info['err']))
+    print ('p,q,s,t,u,w = {}'.format(', '.join('{:.4f}'.format(v) for v in prm)))
+    for name, v in info['measures'].items():
+        print ('{:>12} {:12.4f}{}'.format(name, v,
+               '   target {:.4f}'.format(targets[name]) if name in targets else ''))
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+
+# massprops.py, area, centroid, second moments, volume, and mass of
+# flat parts (outlines extruded to a thickness, less center holes),
+# computed from their exact geometry, with no OpenSCAD run.
+
+# A region's raw moments are its integrals of 1, x, y, x*x, y*y, and
+# x*y, as a row of 6 numbers.  A polygon's come from the shoelace
+# formula and its relatives for higher moments.  An outline with
+# circular arcs is taken as the polygon of the arcs' end points plus,
+# for each arc, the circular segment between the arc and its chord,
+# whose moments have closed forms.  Segments of arcs that go clockwise
+# count negatively, so a center hole is a whole circle going
+# clockwise.  Raw moments of a part's pieces simply add, and those of
+# many parts are found together, in a few array operations.
+
+# Usage: ./massprops.py [-k kind] [-d density] rows
+# where rows is a .csv or .jsonl file as for batch.py (kinds tooth,
+# gear2, and legs; legs rows may give legfit.py targets, as there);
+# prints each part's area, centroid, second moments about its
+# centroid, volume and mass, and the total mass.  Tooth and legs parts
+# are as batch.py writes them, gear2 ones as plate.py does.  Bad rows,
+# eg with an unknown field, are reported and left out.
+
+import argparse, sys, time
+from math import pi, atan2
+import numpy as np
+
+pla = 1.24                      # Density of PLA, g/cm^3
+
+#---------------------------------------------
+def polygonMoments(pts, counts=None):
+    '''Return a k x 6 array of raw moments of k polygons, whose points
+    (counterclockwise) are in pts, an m x 2 array, one polygon after
+    another, counts[i] points in polygon i.  counts defaults to one
+    polygon of all the points.  '''
+    pts = np.asarray(pts, dtype=float)
+    counts = np.asarray([len(pts)] if counts is None else counts)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    nxt = np.arange(1, len(pts)+1)
+    nxt[starts + counts - 1] = starts   # Each polygon's last point joins its first
+    x0, y0 = pts.T
+    x1, y1 = pts[nxt].T
+    c = x0*y1 - x1*y0
+    terms = np.column_stack((c/2, (x0+x1)*c/6, (y0+y1)*c/6,
+                             (x0*x0 + x0*x1 + x1*x1)*c/12, (y0*y0 + y0*y1 + y1*y1)*c/12,
+                             (x0*y1 + 2*x0*y0 + 2*x1*y1 + x1*y0)*c/24))
+    return np.add.reduceat(terms, starts, axis=0)
+
+def segmentMoments(cx, cy, r, a0, span):
+    '''Return a k x 6 array of raw moments of the circular segments
+    between arcs and their chords.  Each arc is on circle C(r, cx, cy)
+    and goes from angle a0 by span (radians, negative for clockwise,
+    up to 2pi for a whole circle).  Arguments are arrays (or scalars)
+    that broadcast together.  Counterclockwise arcs' segments count
+    positively, clockwise ones negatively.  '''
+    cx, cy, r, a0, span = np.broadcast_arrays(*[np.asarray(v, dtype=float).ravel()
+                                                for v in (cx, cy, r, a0, span)])
+    h = np.abs(span)/2                  # Half angle
+    sh, ch = np.sin(h), np.cos(h)
+    r2, r4 = r*r, r**4
+    # Moments about the center, with the segment's axis along +x
+    A = r2*(h - sh*ch)
+    Sx = 2*r*r2*sh**3/3
+    Ixx = r4*(2*h + np.sin(2*h))/8 - r4*ch**3*sh/2   # Integral of x*x
+    Iyy = r4*(2*h - np.sin(2*h))/8 - r4*sh**3*ch/6   # Integral of y*y
+    # Turn the axis to the arc's middle, then move to the center
+    b = a0 + span/2
+    cb, sb = np.cos(b), np.sin(b)
+    sx, sy = cb*Sx, sb*Sx
+    xx, yy, xy = cb*cb*Ixx + sb*sb*Iyy, sb*sb*Ixx + cb*cb*Iyy, cb*sb*(Ixx - Iyy)
+    M = np.column_stack((A, sx + cx*A, sy + cy*A, xx + 2*cx*sx + cx*cx*A,
+                         yy + 2*cy*sy + cy*cy*A, xy + cy*sx + cx*sy + cx*cy*A))
+    return M*np.sign(span)[:,None]
+
+def properties(M, thick=1, density=pla, proud=0):
+    '''Return a dict of arrays of properties of regions with raw moments
+    M (k x 6), extruded thick mm, plus proud mm^3 standing out of their
+    faces: area (mm^2), cx and cy (centroid), Ix, Iy, Ixy (second
+    moments of area about centroidal axes, mm^4, Ix being the integral
+    of y*y), J (polar, Ix+Iy), volume (mm^3), and mass (g, for density
+    in g/cm^3).  '''
+    M = np.atleast_2d(M)
+    A = M[:,0]
+    cx, cy = M[:,1]/A, M[:,2]/A
+    vol = A*thick + proud
+    return {'area': A, 'cx': cx, 'cy': cy, 'Ix': M[:,4] - cy*cy*A, 'Iy': M[:,3] - cx*cx*A,
+            'Ixy': M[:,5] - cx*cy*A, 'J': M[:,3] + M[:,4] - (cx*cx + cy*cy)*A,
+            'volume': vol, 'mass': vol*density/1000}
+
+#---------------------------------------------
+# A part is given as pieces: (polygons, arcs, thick[, proud]), where
+# polygons is a list of counterclockwise n x 2 point arrays, arcs a
+# list of (cx, cy, r, a0, span) tuples, as for segmentMoments, and
+# proud, if given, the volume (mm^3) of anything standing out of the
+# faces of the extruded outline.
+def holeArc(d, center=(0, 0)):
+    '''Return an arc tuple removing a hole of diameter d at center.'''
+    return (center[0], center[1], d/2, 0, -2*pi)
+
+# Piece functions take the same fields as batch.py's makers, so rows
+# work in both; instanced and check make no difference to the solid.
+def toothPieces(nT=20, gmodule=3.0, holeDiam=3.175, gthick=4, pressAngle=28, instanced=False,
+                lod=None):
+    from tooth import gearOutline
+    from gearcore import lods
+    nradii = lods[lod].nradii if lod else 6
+    return [gearOutline(nT, gmodule, pressAngle, nradii).pts], [holeArc(holeDiam)], gthick
+
+def gear2Pieces(a=20, g=25, h=31, m=23, n=5, p=7, s=13, instanced=False, lod=None, check=True):
+    '''Return pieces of the sun and n planets of a GearAssembly, as
+    involute gears of its tooth counts and module, g/10 mm thick, as
+    plate.py lays them out.  (Not as gear2.py and batch.py write them:
+    gearSubtree stacks root, pitch, and tip cylinders, with cube
+    teeth, about 1 mm tall whatever g is.)  '''
+    from tooth import gearOutline
+    from gearcore import lods
+    nradii = lods[lod].nradii if lod else 6
+    gears = [gearOutline(s, m/10, a, nradii).pts] + [gearOutline(p, m/10, a, nradii).pts]*n
+    return gears, [holeArc(h/10)]*(n+1), g/10
+
+def legsPieces(p=40, q=10, s=-30, t=-100, u=40, w=-20, analytic=False, tol=0.01, lod=None,
+               thick=1):
+    '''Return pieces of an ArmParams arm: the polygon of its four
+    tangency points and the segments of its four arcs, exactly, so tol
+    and lod don't matter.  Unless analytic, the arm is as getOblongArm's CSG makes it, whose
+    end cylinders stand 0.05 mm out of each face.  '''
+    from gearcore import ArmParams
+    arcs = ArmParams(p,q,s,t,u,w).getArcs()
+    # In OpenSCAD coordinates, y is negated; reverse the order, and
+    # each arc, to stay counterclockwise
+    corners = np.array([a for c, r, a, b in arcs])[::-1]*(1,-1)
+    segs = []
+    for (cx, cy), r, a, b in arcs:
+        a0, a1 = atan2(a[1]-cy, a[0]-cx), atan2(b[1]-cy, b[0]-cx)
+        segs.append((cx, -cy, r, -a1, (a1 - a0) % (2*pi)))
+    proud = 0 if analytic else 0.1*pi*(arcs[0][1]**2 + arcs[2][1]**2)
+    return [corners], segs, thick, proud
+
+# Kind name -> function returning pieces for a row
+kinds = {'tooth': toothPieces, 'gear2': gear2Pieces, 'legs': legsPieces}
+
+def partMoments(parts):
+    '''Return raw moments (k x 6), thicknesses (k), and proud volumes
+    (k) of k parts, each given as pieces, all computed together.  '''
+    pts, counts, pOwner, arcs, aOwner, thick, proud = [], [], [], [], [], [], []
+    for i, (polys, arcList, th, *more) in enumerate(parts):
+        proud.append(more[0] if more else 0)
+        pts += polys
+        counts += [len(pl) for pl in polys]
+        pOwner += [i]*len(polys)
+        arcs += arcList
+        aOwner += [i]*len(arcList)
+        thick.append(th)
+    M = np.zeros((len(parts), 6))
+    if pts:
+        np.add.at(M, pOwner, polygonMoments(np.concatenate(pts), counts))
+    if arcs:
+        np.add.at(M, aOwner, segmentMoments(*np.array(arcs, dtype=float).T))
+    return M, np.array(thick, dtype=float), np.array(proud, dtype=float)
+
+def plateMass(parts, density=pla):
+    '''Return per-part masses (g) of plate.Part objects, as outlines
+    less center holes.  '''
+    pieces = [([p.pts], [holeArc(p.holeDiam, p.center)] if p.holeDiam > 0 else [], p.thick)
+              for p in parts]
+    return properties(*partMoments(pieces)[:2], density)['mass']
+
+#---------------------------------------------
+if __name__ == '__main__':
+    from batch import readRows, fitLegsRow
+    ap = argparse.ArgumentParser(description='Find mass properties of gears and legs.')
+    ap.add_argument('rows', help='.csv or .jsonl file of parameter rows, as for batch.py')
+    ap.add_argument('-k', '--kind', choices=sorted(kinds), default='tooth',
+                    help='kind of part for rows without a kind field (default: tooth)')
+    ap.add_argument('-d', '--density', type=float, default=pla,
+                    help='g/cm^3 (default %(default)s, PLA)')
+    args = ap.parse_args()
+    t0 = time.perf_counter()
+    good, pieces, bad = [], [], []
+    for i, row in enumerate(readRows(args.rows)):
+        row = dict(row)
+        k = row.pop('kind', args.kind)
+        try:
+            if k not in kinds:
+                raise ValueError('unknown kind {!r}; use {}'.format(k, ', '.join(kinds)))
+            pieces.append(kinds[k](**(fitLegsRow(row)[0] if k == 'legs' else row)))
+            good.append((i, k))
+        except Exception as e:  # Report the row, go on with the rest
+            bad.append('Row {} ({}): {}: {}'.format(i, k, type(e).__name__, e))
+    M, thick, proud = partMoments(pieces)
+    props = properties(M, thick, args.density, proud)
+    t1 = time.perf_counter()
+    print ('{:>4} {:>6} {:>10} {:>8} {:>8} {:>12} {:>12} {:>10} {:>9}'.format(
+        'row', 'kind', 'area mm2', 'cx', 'cy', 'Ix mm4', 'Iy mm4', 'vol mm3', 'mass g'))
+    for j, (i, k) in enumerate(good):
+        print ('{:4} {:>6} {:10.2f} {:8.3f} {:8.3f} {:12.1f} {:12.1f} {:10.1f} {:9.3f}'.format(
+            i, k, *[props[n][j] for n in ('area', 'cx', 'cy', 'Ix', 'Iy', 'volume', 'mass')]))
+    for line in bad:
+        print (line)
+    print ('{} parts, total {:.3f} g at {} g/cm^3, in {:.1f} ms'.format(
+        len(good), props['mass'].sum(), args.density, (t1-t0)*1000))
+    sys.exit(1 if bad else 0)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+# meshout.py, writes binary STL and 2D DXF files for planar parts
+# straight from their computed outlines, with no OpenSCAD render.
+# Parts here are 2D outlines (less an optional round center hole)
+# extruded to constant thickness, and their outlines are star-shaped
+# about their centers: each ray from the center crosses the outline
+# once.  So the caps triangulate as a strip of quads between the
+# outline and the hole (or as a fan from the center, if no hole), and
+# the side walls as quads between consecutive outline points, all
+# computed as array operations.
+
+# Usage: ./meshout.py [nT [gM [hD [thick]]]] writes tooth.stl and
+# tooth.dxf for spurGear(nT, gM, hD, thick); ./meshout.py --bench
+# times that against an OpenSCAD render, if openscad is available.
+
+import os, sys, tempfile, time
+import numpy as np
+
+#---------------------------------------------
+def starAngles(outline, center=(0,0)):
+    '''Return outline (as a counterclockwise n x 2 array) and the
+    unwrapped, increasing angles of its points about center.  Raise
+    ValueError if outline isn't star-shaped about center.  '''
+    pts = np.asarray(outline, dtype=float)
+    x, y = pts[:,0]-center[0], pts[:,1]-center[1]
+    if np.dot(x, np.roll(y,-1)) - np.dot(np.roll(x,-1), y) < 0:
+        pts, x, y = pts[::-1], x[::-1], y[::-1]   # Make it counterclockwise
+    ang = np.unwrap(np.arctan2(y, x))
+    steps = np.diff(np.append(ang, ang[0]+2*np.pi))
+    if np.any(steps <= 0):
+        raise ValueError('Outline is not star-shaped about {}'.format(center))
+    return pts, ang
+
+def extrude(outline, thick, holeDiam=0, center=(0,0)):
+    '''Return an m x 3 x 3 array of triangles (vertices counterclockwise
+    seen from outside) for outline, less a round hole of diameter
+    holeDiam at center, extruded from z=0 to z=thick.  '''
+    pts, ang = starAngles(outline, center)
+    n, cx, cy = len(pts), center[0], center[1]
+    nxt = np.roll(np.arange(n), -1)
+    lo = np.column_stack((pts, np.zeros(n)))
+    hi = np.column_stack((pts, np.full(n, float(thick))))
+    if holeDiam > 0:
+        rh = holeDiam/2.0
+        if rh >= np.min(np.hypot(pts[:,0]-cx, pts[:,1]-cy)):
+            raise ValueError('Hole diameter {} reaches the outline'.format(holeDiam))
+        hxy = np.column_stack((cx + rh*np.cos(ang), cy + rh*np.sin(ang)))
+        hlo = np.column_stack((hxy, np.zeros(n)))
+        hhi = np.column_stack((hxy, np.full(n, float(thick))))
+        tris = [np.stack((hhi, hi, hi[nxt]), 1),  np.stack((hhi, hi[nxt], hhi[nxt]), 1),  # Top
+                np.stack((hlo, lo[nxt], lo), 1),  np.stack((hlo, hlo[nxt], lo[nxt]), 1),  # Bottom
+                np.stack((hlo[nxt], hlo, hhi), 1), np.stack((hlo[nxt], hhi, hhi[nxt]), 1)] # Hole
+    else:
+        clo, chi = np.tile([cx, cy, 0.], (n,1)), np.tile([cx, cy, float(thick)], (n,1))
+        tris = [np.stack((chi, hi, hi[nxt]), 1), np.stack((clo, lo[nxt], lo), 1)]
+    tris += [np.stack((lo, lo[nxt], hi[nxt]), 1), np.stack((lo, hi[nxt], hi), 1)] # Outer wall
+    return np.concatenate(tris)
+
+#---------------------------------------------
+def writeSTL(path, tris, name='meshout'):
+    '''Write triangles tris (m x 3 x 3) to path as a binary STL file.'''
+    tris = np.asarray(tris, dtype=float)
+    nrm = np.cross(tris[:,1]-tris[:,0], tris[:,2]-tris[:,0])
+    nrm /= np.maximum(np.linalg.norm(nrm, axis=1), 1e-30)[:,None]
+    rec = np.zeros(len(tris), dtype=np.dtype([('n', '<f4', 3), ('v', '<f4', (3,3)), ('a', '<u2')]))
+    rec['n'], rec['v'] = nrm, tris
+    with open(path, 'wb') as fo:
+        fo.write(name.encode()[:80].ljust(80, b' '))
+        fo.write(np.uint32(len(tris)).tobytes())
+        fo.write(rec.tobytes())
+
+def writeDXF(path, outline, holeDiam=0, center=(0,0)):
+    '''Write outline (a closed POLYLINE) and its round center hole (a
+    CIRCLE) to path as a minimal R12 DXF file.  '''
+    pts = np.asarray(outline, dtype=float)
+    with open(path, 'w') as fo:
+        fo.write('0\nSECTION\n2\nENTITIES\n')
+        fo.write('0\nPOLYLINE\n8\n0\n66\n1\n70\n1\n10\n0.0\n20\n0.0\n30\n0.0\n')
+        np.savetxt(fo, pts, fmt='0\nVERTEX\n8\n0\n10\n%.6f\n20\n%.6f\n30\n0.0')
+        fo.write('0\nSEQEND\n8\n0\n')
+        if holeDiam > 0:
+            fo.write('0\nCIRCLE\n8\n0\n10\n{:.6f}\n20\n{:.6f}\n30\n0.0\n40\n{:.6f}\n'.format(
+                center[0], center[1], holeDiam/2.0))
+        fo.write('0\nENDSEC\n0\nEOF\n')
+
+#---------------------------------------------
+def exportGear(base, nT=20, gmodule=3.0, holeDiam=3.175, gthick=4, pressAngle=28):
+    '''Write base.stl and base.dxf for spurGear(nT, gmodule, holeDiam,
+    gthick, pressAngle), centered like spurGear's (z from -gthick/2
+    to gthick/2).  Return the number of triangles.  '''
+    from tooth import gearProfile
+    outline = gearProfile(nT, gmodule, pressAngle)
+    tris = extrude(outline, gthick, holeDiam)
+    tris[:,:,2] -= gthick/2.0
+    writeSTL(base+'.stl', tris, 'spurGear {} {} {}'.format(nT, gmodule, holeDiam))
+    writeDXF(base+'.dxf', outline, holeDiam)
+    return len(tris)
+
+def benchmark(nTs=(12, 50, 200, 500), gmodule=1):
+    '''Print times to make STL files of spurGear gears with nT teeth
+    for each nT in nTs, via exportGear and, if openscad is on the
+    PATH, via an OpenSCAD render of the spurGear .scad file (written
+    by scadwriter.writeScad, as the GUIs and batch.py write it).  '''
+    from scadwriter import writeScad
+    from tooth import spurGear
+    from scadtools import openscadTime
+    outDir = tempfile.mkdtemp()
+    print ('{:>5} {:>9} {:>10} {:>11}'.format('nT', 'triangles', 'native ms', 'openscad ms'))
+    for nT in nTs:
+        base = os.path.join(outDir, 'g{}'.format(nT))
+        t0 = time.perf_counter()
+        ntri = exportGear(base, nT, gmodule)
+        tn = time.perf_counter() - t0
+        writeScad(base+'.scad', spurGear(nT, gmodule, 3.175))
+        to = openscadTime(base+'.scad', export='stl')
+        print ('{:5} {:9} {:10.2f} {:>11}'.format(nT, ntri, tn*1000,
+                '-' if to is None else '{:.1f}'.format(to*1000)))
+
+#---------------------------------------------
+if __name__ == '__main__':
+    if '--bench' in sys.argv:
+        benchmark()
+        sys.exit()
+    argv = sys.argv
+    arn = 0
+    arn+=1; nT  = int(argv[arn]) if len(argv)>arn else 20
+    arn+=1; gM  = float(argv[arn]) if len(argv)>arn else 3.0
+    arn+=1; hD  = float(argv[arn]) if len(argv)>arn else 3.175
+    arn+=1; gT  = float(argv[arn]) if len(argv)>arn else 4
+    ntri = exportGear('tooth', nT, gM, hD, gT)
+    print ('Wrote {} triangles to tooth.stl, and outline to tooth.dxf'.format(ntri))
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+# outline.py, compact 2D outlines, and a store holding many of them.
+# An Outline keeps its points in one contiguous n x 2 float array;
+# an outline made of nParts equal-sized parts (like a gear's teeth)
+# gives zero-copy views of them.  It turns into a SolidPython polygon
+# only when asked, at the point of output.
+
+# An outline store is two files: base.npy, holding the points of all
+# outlines one after another as one m x 2 float64 array, and
+# base.json, an index giving each outline's offset and point count in
+# that array, its number of parts, and whatever else (like kind and
+# parameters) the writer recorded.  OutlineStore memory-maps the .npy
+# file, so a tool can open a store of thousands of gear and leg
+# profiles and touch only the ones it uses.
+
+# Usage: ./outline.py base  lists the outlines in store base.
+
+import json, sys
+import numpy as np
+
+#---------------------------------------------
+class Outline:
+    '''A closed 2D outline of n points, as an n x 2 float array, made
+    of nParts parts of n/nParts points each.  points isn't copied if
+    it already is a C-contiguous float64 array.  '''
+    __slots__ = ('pts', 'nParts')
+
+    def __init__(self, points, nParts=1):
+        self.pts = np.ascontiguousarray(points, dtype=float).reshape(-1, 2)
+        if nParts < 1 or len(self.pts) % nParts:
+            raise ValueError('{} points do not split into {} parts'.format(len(self.pts), nParts))
+        self.nParts = nParts
+
+    def __len__(self):
+        return len(self.pts)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.pts if dtype is None else self.pts.astype(dtype)
+
+    def parts(self):
+        '''Return an nParts x (n/nParts) x 2 view of the points.'''
+        return self.pts.reshape(self.nParts, -1, 2)
+
+    def part(self, i):
+        '''Return a view of the points of part i.'''
+        return self.parts()[i]
+
+    def bounds(self):
+        '''Return ((xmin, ymin), (xmax, ymax)) of the outline.'''
+        return self.pts.min(axis=0), self.pts.max(axis=0)
+
+    def polygon(self):
+        '''Return the outline as a SolidPython polygon.'''
+        from solid import polygon
+        return polygon(self.pts.tolist())
+
+#---------------------------------------------
+def saveOutlines(base, outlines, infos=None):
+    '''Write outlines (a sequence of Outline objects) to store files
+    base.npy and base.json.  infos, if given, is a parallel sequence of
+    dicts whose items go into each outline's index entry.  Return the
+    number of outlines written.  '''
+    outlines = list(outlines)
+    infos = list(infos) if infos is not None else [{}]*len(outlines)
+    counts = np.array([len(o) for o in outlines], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+    pts = np.lib.format.open_memmap(base+'.npy', mode='w+', dtype=float,
+                                    shape=(int(counts.sum()), 2))
+    entries = []
+    for o, info, off, cnt in zip(outlines, infos, offsets, counts):
+        pts[off:off+cnt] = o.pts
+        entries.append(dict(info, offset=int(off), count=int(cnt), parts=o.nParts))
+    pts.flush()
+    del pts
+    with open(base+'.json', 'w') as fo:
+        json.dump({'version': 1, 'outlines': entries}, fo, indent=0)
+    return len(entries)
+
+class OutlineStore:
+    '''Read-only access to the outlines in store base (as written by
+    saveOutlines).  store[i] is an Outline whose points are a view into
+    the memory-mapped .npy file; store.info[i] is its index entry.  '''
+    def __init__(self, base, mmap=True):
+        with open(base+'.json') as fi:
+            self.info = json.load(fi)['outlines']
+        self.pts = np.load(base+'.npy', mmap_mode='r' if mmap else None)
+
+    def __len__(self):
+        return len(self.info)
+
+    def __getitem__(self, i):
+        e = self.info[i]
+        o = Outline.__new__(Outline)    # Skip the copying checks
+        o.pts, o.nParts = self.pts[e['offset']:e['offset']+e['count']], e['parts']
+        return o
+
+    def find(self, **match):
+        '''Return indexes of outlines whose index entries, or their
+        params dicts, have all the items in match.  '''
+        return [i for i, e in enumerate(self.info)
+                if all(e.get(k, e.get('params', {}).get(k)) == v for k, v in match.items())]
+
+#---------------------------------------------
+if __name__ == '__main__':
+    store = OutlineStore(sys.argv[1])
+    for i, e in enumerate(store.info):
+        lo, hi = store[i].bounds()
+        print ('{:5} {:6} {:5} points {:4} parts  x {:8.3f} to {:8.3f}  y {:8.3f} to {:8.3f}  {}'.format(
+            i, e.get('kind', ''), e['count'], e['parts'], lo[0], hi[0], lo[1], hi[1],
+            json.dumps(e.get('params', {}))))
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+# planetsearch.py, searches planetary gear layouts for a target
+# reduction ratio and size.  It enumerates sun and planet tooth counts
+# s and p, planet counts n, and modules m as one broadcast grid of
+# candidates, drops those that break constraints, and ranks the rest
+# by ratio error, then outer diameter, then fewest teeth on the
+# smaller gear (more is better, for less undercut).  Constraints:
+#   - adjacent planets' tip circles clear each other by clear mm
+#   - a ring gear of s+2p teeth assembles with n evenly spaced
+#     planets: (s + s+2p)/n is an integer
+# (those two, and the hole fit below, come from gearcore.checkPlanetary)
+#   - neither gear has fewer teeth than minTeeth (default, the least
+#     count without undercut at pressure angle a, int(2/sin(a)^2))
+#   - outer diameter, the ring's tip circle (s+2p+2)m, is at most
+#     maxDiam, and the center hole fits inside both root circles
+# The ratio is that of the sun turning a carrier with the ring fixed,
+# 1 + (s+2p)/s.  Results are GearAssembly parameter sets, so
+# GearAssembly(**r['params']).makeAssembly() builds one.
+
+# Usage: ./planetsearch.py ratio [-d maxDiam] [-t top] [--jsonl out]
+# where --jsonl writes the top results as gear2 rows for batch.py.
+
+import argparse, json, sys, time
+from math import sin, pi
+import numpy as np
+from gearcore import checkPlanetary
+
+#---------------------------------------------
+def searchPlanetary(ratio, maxDiam=None, sRange=(6, 120), pRange=(6, 120),
+                    nRange=(2, 8), mods=(5, 6, 8, 10, 12, 15, 20, 25, 30),
+                    a=20, g=25, h=31, top=10, clear=0.5, minTeeth=None, ring=True):
+    '''Return a list of up to top dicts for the best planetary layouts
+    for reduction ratio, ranked as above.  Each has params (a dict of
+    GearAssembly a,g,h,m,n,p,s), ratio, ratioErr (relative), diam (mm),
+    and clearance (mm).  sRange, pRange and nRange are inclusive
+    (low, high) bounds; mods lists modules to try, in mm*10 as in
+    GearAssembly, as are g and h.  If ring is false, the ring assembly
+    condition is not required.  '''
+    if minTeeth is None:
+        minTeeth = int(2/sin(a*pi/180)**2)
+    s = np.arange(max(sRange[0], minTeeth), sRange[1]+1).reshape(-1,1,1,1)
+    p = np.arange(max(pRange[0], minTeeth), pRange[1]+1).reshape(1,-1,1,1)
+    n = np.arange(max(nRange[0], 1), nRange[1]+1).reshape(1,1,-1,1)
+    m = np.asarray(mods, dtype=float).reshape(1,1,1,-1)/10
+    ratios = 1 + (s + 2*p)/s
+    diam = (s + 2*p + 2)*m
+    c = checkPlanetary(s, p, n, m, h/10, clear)
+    clearance, keep = c['clearance'], c['ok']
+    if ring:
+        keep = keep & c['ring']
+    if maxDiam is not None:
+        keep = keep & (diam <= maxDiam)
+    si, pj, ni, mi = np.nonzero(keep)
+    err = np.abs(ratios[si, pj, 0, 0]/ratio - 1)
+    dia = diam[si, pj, 0, mi]
+    fewest = np.minimum(s[si,0,0,0], p[0,pj,0,0])
+    # Rank on ratio error (to a part per million), diameter, fewest teeth
+    order = np.lexsort((-fewest, dia, np.round(err, 6)))[:top]
+    res = []
+    for j in order:
+        sv, pv = int(s[si[j],0,0,0]), int(p[0,pj[j],0,0])
+        nv, mv = int(n[0,0,ni[j],0]), mods[mi[j]]
+        res.append({'params': {'a': a, 'g': g, 'h': h, 'm': mv, 'n': nv, 'p': pv, 's': sv},
+                    'ratio': float(ratios[si[j], pj[j], 0, 0]), 'ratioErr': float(err[j]),
+                    'diam': float(dia[j]), 'clearance': float(clearance[si[j], pj[j], ni[j], mi[j]])})
+    return res
+
+#---------------------------------------------
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Search planetary gear layouts for a reduction ratio.')
+    ap.add_argument('ratio', type=float, help='target ratio, sun turns per carrier turn')
+    ap.add_argument('-d', '--maxdiam', type=float, default=None, help='largest outer diameter, mm')
+    ap.add_argument('-t', '--top', type=int, default=10, help='number of layouts to list')
+    ap.add_argument('-a', type=int, default=20, help='pressure angle, degrees')
+    ap.add_argument('--no-ring', action='store_true', help="don't require ring assembly condition")
+    ap.add_argument('--jsonl', help='write results as gear2 rows for batch.py to this file')
+    args = ap.parse_args()
+    t0 = time.perf_counter()
+    res = searchPlanetary(args.ratio, args.maxdiam, a=args.a, top=args.top,
+                          ring=not args.no_ring)
+    print ('{:>3} {:>3} {:>2} {:>4} {:>9} {:>9} {:>8} {:>8}'.format(
+        's', 'p', 'n', 'm', 'ratio', 'error', 'diam', 'clear'))
+    for r in res:
+        q = r['params']
+        print ('{:3} {:3} {:2} {:4} {:9.4f} {:9.2e} {:8.2f} {:8.2f}'.format(
+            q['s'], q['p'], q['n'], q['m'], r['ratio'], r['ratioErr'], r['diam'], r['clearance']))
+    print ('Searched in {:.2f} s'.format(time.perf_counter()-t0))
+    if args.jsonl:
+        with open(args.jsonl, 'w') as fo:
+            for r in res:
+                fo.write(json.dumps(dict(r['params'], kind='gear2')) + '\n')
+    sys.exit(0 if res else 1)
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+
+# plate.py, lays out many flat parts -- spurGear gears, the sun and
+# planets of GearAssemblys, and leg arms -- on print beds, and writes
+# each bed as one .scad file and one STL file.  Each part is its 2D
+# outline (less a round center hole) extruded to its thickness.
+
+# Layout is bottom-left first fit.  Parts go largest first; each goes
+# at the lowest, then leftmost, candidate corner (the bed corner, and
+# the corners just right of and just above each placed part) where it
+# clears the bed edges, and every placed part by the clearance margin.
+# A part clears another if their bounding boxes or their bounding
+# circles are at least margin apart.  Placed parts are kept in a grid
+# of cells about as big as a typical part, so each test looks only at
+# parts in nearby cells.  When nothing fits, a new bed starts.
+
+# Usage: ./plate.py [-W width] [-H height] [-m margin] [-d density] [-o base] rows
+# where rows is a .csv or .jsonl file as for batch.py (kinds tooth,
+# gear2, and legs; legs rows may give legfit.py targets); writes
+# base-1.scad, base-1.stl, base-2.scad, ... and prints each bed's mass
+# of material (see massprops.py).  Bad rows, eg with an unknown field,
+# are reported and left out.
+
+import argparse, bisect, sys, time
+from math import floor
+import numpy as np
+
+#---------------------------------------------
+class Part:
+    '''One flat part: outline (an outline.Outline, or n x 2 array) less
+    a hole of diameter holeDiam at center, thick mm thick.  Gives its
+    bounding box and bounding circle; x, y, and bed are set when it's
+    placed, moving its bounding box's low corner to (x, y).  '''
+    __slots__ = ('name', 'pts', 'holeDiam', 'center', 'thick', 'lo', 'size',
+                 'cc', 'rad', 'x', 'y', 'bed')
+
+    def __init__(self, name, outline, thick=4, holeDiam=0, center=(0, 0)):
+        self.name, self.thick, self.holeDiam = name, thick, holeDiam
+        self.pts = np.asarray(outline, dtype=float)
+        self.center = np.asarray(center, dtype=float)
+        self.lo = self.pts.min(axis=0)
+        self.size = self.pts.max(axis=0) - self.lo
+        self.cc = self.lo + self.size/2     # Bounding circle, about box center
+        self.rad = float(np.max(np.hypot(*(self.pts - self.cc).T)))
+        self.x = self.y = self.bed = None
+
+    def offset(self):
+        '''Return the translation that puts this part where it's placed.'''
+        return np.array([self.x, self.y]) - self.lo
+
+# Part functions take the same fields as batch.py's makers, so rows
+# work in both; fields that only matter to .scad output (instanced,
+# check, analytic) make no difference to a part's outline.
+def toothPart(nT=20, gmodule=3.0, holeDiam=3.175, gthick=4, pressAngle=28, instanced=False,
+              lod=None):
+    from tooth import gearOutline
+    from gearcore import lods
+    nradii = lods[lod].nradii if lod else 6
+    return [Part('tooth {}'.format(nT), gearOutline(nT, gmodule, pressAngle, nradii).pts,
+                 gthick, holeDiam)]
+
+def gear2Parts(a=20, g=25, h=31, m=23, n=5, p=7, s=13, instanced=False, lod=None, check=True):
+    '''Return parts for the sun and n planets of a GearAssembly, as
+    involute gears of its tooth counts and module.  '''
+    from tooth import gearOutline
+    from gearcore import lods
+    nradii = lods[lod].nradii if lod else 6
+    sun = Part('sun {}'.format(s), gearOutline(s, m/10, a, nradii).pts, g/10, h/10)
+    plan = gearOutline(p, m/10, a, nradii).pts
+    return [sun] + [Part('planet {} #{}'.format(p, i+1), plan, g/10, h/10) for i in range(n)]
+
+def legsPart(p=40, q=10, s=-30, t=-100, u=40, w=-20, analytic=False, tol=0.01, lod=None,
+             thick=1):
+    from gearcore import ArmParams, lods
+    pts = ArmParams(p,q,s,t,u,w).getArmOutline(lods[lod].tol if lod else tol)
+    return [Part('legs', pts, thick, 0, pts.mean(axis=0))]
+
+def rowParts(kind, row):
+    '''Return parts for row (a dict of fields, less kind) of kind.  A
+    legs row with legfit targets is fitted first, as batch.py does.
+    Raise an exception if the row is bad, eg has an unknown field.  '''
+    from batch import fitLegsRow
+    if kind not in kinds:
+        raise ValueError('unknown kind {!r}; use {}'.format(kind, ', '.join(kinds)))
+    if kind == 'legs':
+        row = fitLegsRow(row)[0]
+    return kinds[kind](**row)
+
+# Kind name -> function returning a list of parts for a row
+kinds = {'tooth': toothPart, 'gear2': gear2Parts, 'legs': legsPart}
+
+#---------------------------------------------
+class Grid:
+    '''Spatial index of placed parts' bounding boxes, on a grid of
+    square cells of side cell.  '''
+    def __init__(self, cell):
+        self.cell, self.cells = cell, {}
+
+    def span(self, x0, y0, x1, y1):
+        c = self.cell
+        return range(floor(x0/c), floor(x1/c)+1), range(floor(y0/c), floor(y1/c)+1)
+
+    def add(self, part):
+        xs, ys = self.span(part.x, part.y, part.x+part.size[0], part.y+part.size[1])
+        for i in xs:
+            for j in ys:
+                self.cells.setdefault((i, j), []).append(part)
+
+    def near(self, x0, y0, x1, y1):
+        '''Return the set of parts in cells overlapping box (x0,y0)-(x1,y1).'''
+        xs, ys = self.span(x0, y0, x1, y1)
+        out = set()
+        for i in xs:
+            for j in ys:
+                out.update(self.cells.get((i, j), ()))
+        return out
+
+def clears(part, x, y, other, margin):
+    '''Return True if part, with box corner at (x, y), is at least margin
+    from placed part other, by bounding boxes or by bounding circles.  '''
+    w, h = part.size
+    if (x >= other.x + other.size[0] + margin or other.x >= x + w + margin or
+        y >= other.y + other.size[1] + margin or other.y >= y + h + margin):
+        return True
+    dx = x + (part.cc[0]-part.lo[0]) - (other.x + other.cc[0]-other.lo[0])
+    dy = y + (part.cc[1]-part.lo[1]) - (other.y + other.cc[1]-other.lo[1])
+    return dx*dx + dy*dy >= (part.rad + other.rad + margin)**2
+
+def layout(parts, width=220, height=220, margin=2):
+    '''Place parts on beds of width x height mm, margin mm apart and
+    from bed edges; set each part's x, y, and bed.  Return the number
+    of beds used.  Raise ValueError if a part can't fit on a bed.  '''
+    if not parts: return 0
+    order = sorted(parts, key=lambda p: -p.size[0]*p.size[1])
+    cell = max(float(np.median([max(p.size) for p in parts])), margin, 1e-3)
+    # Per bed: grid, sorted candidate (y, x) list, and (w, h, rad) of
+    # parts that found no place there since the bed last changed
+    beds = []
+    for part in order:
+        w, h = part.size
+        if w + 2*margin > width or h + 2*margin > height:
+            raise ValueError('{} ({:.1f} x {:.1f} mm) does not fit the bed'.format(part.name, w, h))
+        for bed in range(len(beds)+1):
+            if bed == len(beds):    # Nothing fits on earlier beds; start another
+                beds.append((Grid(cell), [(margin, margin)], []))
+            grid, cands, failed = beds[bed]
+            # A part at least as big every way as one that failed fails too
+            if any(w >= fw and h >= fh and part.rad >= fr for fw, fh, fr in failed):
+                continue
+            dead, k = [], None
+            for i, (y, x) in enumerate(cands):
+                if x + w + margin > width or y + h + margin > height: continue
+                near = grid.near(x-margin, y-margin, x+w+margin, y+h+margin)
+                if any(o.x <= x < o.x+o.size[0] and o.y <= y < o.y+o.size[1] for o in near):
+                    dead.append(i)      # Covered by a part; no use to anyone
+                    continue
+                if all(clears(part, x, y, o, margin) for o in near):
+                    k = i
+                    break
+            for i in reversed(dead):
+                del cands[i]
+            if k is None:
+                failed.append((w, h, part.rad))
+                continue
+            y, x = cands.pop(k - len(dead))
+            part.x, part.y, part.bed = x, y, bed
+            grid.add(part)
+            for c in ((y, x + w + margin), (y + h + margin, x)):
+                cands.insert(bisect.bisect(cands, c), c)
+            del failed[:]
+            break
+    return len(beds)
+
+#---------------------------------------------
+def plateScad(parts):
+    '''Return a SolidPython union of parts, each placed where layout put it.'''
+    from solid import cylinder, linear_extrude, polygon, translate, union
+    asm = union()
+    for p in parts:
+        dx, dy = p.offset()
+        body = linear_extrude(p.thick)(polygon((p.pts).tolist()))
+        if p.holeDiam > 0:
+            cx, cy = p.center
+            body -= translate([cx, cy, -0.1])(cylinder(d=p.holeDiam, h=p.thick+0.2))
+        asm.add(translate([dx, dy, 0])(body))
+    return asm
+
+def plateTriangles(parts):
+    '''Return an m x 3 x 3 array of STL triangles of parts, as placed.'''
+    from meshout import extrude
+    tris = []
+    for p in parts:
+        t = extrude(p.pts, p.thick, p.holeDiam, p.center)
+        t[:,:,:2] += p.offset()
+        tris.append(t)
+    return np.concatenate(tris)
+
+def writePlates(base, parts, nBeds):
+    '''Write base-k.scad and base-k.stl for each bed k; return names.'''
+    from scadwriter import writeScad
+    from meshout import writeSTL
+    names = []
+    for bed in range(nBeds):
+        on = [p for p in parts if p.bed == bed]
+        name = '{}-{}'.format(base, bed+1)
+        writeScad(name+'.scad', plateScad(on), '$fn = 60;')
+        writeSTL(name+'.stl', plateTriangles(on), name)
+        names.append(name)
+    return names
+
+#---------------------------------------------
+if __name__ == '__main__':
+    from batch import readRows
+    from massprops import plateMass, pla
+    ap = argparse.ArgumentParser(description='Lay out gears and legs on print beds.')
+    ap.add_argument('rows', help='.csv or .jsonl file of parameter rows, as for batch.py')
+    ap.add_argument('-k', '--kind', choices=sorted(kinds), default='tooth',
+                    help='kind of part for rows without a kind field (default: tooth)')
+    ap.add_argument('-W', '--width', type=float, default=220, help='bed width, mm')
+    ap.add_argument('-H', '--height', type=float, default=220, help='bed depth, mm')
+    ap.add_argument('-m', '--margin', type=float, default=2, help='clearance between parts, mm')
+    ap.add_argument('-o', '--out', default='plate', help='output base name')
+    ap.add_argument('-d', '--density', type=float, default=pla,
+                    help='for part masses, g/cm^3 (default %(default)s, PLA)')
+    args = ap.parse_args()
+    parts, nbad = [], 0
+    for i, row in enumerate(readRows(args.rows)):
+        row = dict(row)
+        kind = row.pop('kind', args.kind)
+        try:
+            parts += rowParts(kind, row)
+        except Exception as e:  # Report the row, lay out the rest
+            print ('Row {} ({}): {}: {}'.format(i, kind, type(e).__name__, e))
+            nbad += 1
+    t0 = time.perf_counter()
+    nBeds = layout(parts, args.width, args.height, args.margin)
+    t1 = time.perf_counter()
+    names = writePlates(args.out, parts, nBeds)
+    print ('Laid out {} parts on {} beds in {:.3f} s; wrote {}'.format(
+        len(parts), nBeds, t1-t0, ', '.join(n+'.scad/.stl' for n in names)))
+    mass = plateMass(parts, args.density)
+    beds = np.array([p.bed for p in parts])
+    print ('Mass at {} g/cm^3: {}; total {:.2f} g'.format(args.density, ', '.join(
+        'bed {} {:.2f} g'.format(b+1, mass[beds == b].sum()) for b in range(nBeds)), mass.sum()))
+    sys.exit(1 if nbad else 0)
@@ -0,0 +1,211 @@
+# previewpane.py, a Qt widget that draws the preview shapes of the
+# gear and leg parameter classes (see previewShapes in gearcore.py)
+# with QPainter, scaled to fit, with y up as in OpenSCAD.  The GUIs
+# redraw it on every spinbox change, straight from the in-memory
+# geometry, and show how many ms the geometry and the drawing took.
+# Their Explore windows show a grid of small panes of neighboring
+# parameter sets, evaluated in worker processes by explore.py.
+
+import time
+from PyQt5.QtCore import Qt, QPointF, QRectF, QTimer
+from PyQt5.QtGui import QColor, QPainter, QPainterPath, QPen, QPolygonF
+from PyQt5.QtWidgets import QComboBox, QGridLayout, QHBoxLayout, QLabel
+from PyQt5.QtWidgets import QSpinBox, QVBoxLayout, QWidget
+import numpy as np
+
+#---------------------------------------------
+class PreviewPane(QWidget):
+    '''Widget drawing a list of preview shapes.'''
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.shapes, self.geomMs, self.drawMs = [], 0, 0
+        self.note, self.greyed = '', False
+        self.setMinimumSize(320, 320)
+
+    def setShapes(self, shapes, geomMs=0, note=''):
+        '''Show shapes; geomMs is the time taken to compute them.'''
+        self.shapes, self.geomMs, self.note = shapes, geomMs, note
+        self.update()
+
+    def bounds(self):
+        '''Return (xmin, ymin, xmax, ymax) of all shapes.'''
+        lo, hi = [], []
+        for kind, data, color in self.shapes:
+            if kind == 'poly':
+                lo.append(data.min(axis=0)); hi.append(data.max(axis=0))
+            elif kind == 'circle':
+                x, y, r = data
+                lo.append((x-r, y-r)); hi.append((x+r, y+r))
+            else:
+                lo.append(data); hi.append(data)
+        lo, hi = np.min(lo, axis=0), np.max(hi, axis=0)
+        return lo[0], lo[1], hi[0], hi[1]
+
+    def caption(self):
+        return '{}geometry {:.1f} ms, draw {:.1f} ms'.format(
+            self.note + '  ' if self.note else '', self.geomMs, self.drawMs)
+
+    def paintEvent(self, event):
+        t0 = time.perf_counter()
+        qp = QPainter(self)
+        qp.setRenderHint(QPainter.Antialiasing)
+        qp.fillRect(self.rect(), QColor('gainsboro' if self.greyed else 'white'))
+        if self.shapes:
+            x0, y0, x1, y1 = self.bounds()
+            w, h = max(x1-x0, 1e-6), max(y1-y0, 1e-6)
+            ph = self.height() - 16         # Leave room for the caption
+            k = 0.92*min(self.width()/w, ph/h)
+            qp.save()           # Map model coordinates to the widget, y up
+            qp.translate(self.width()/2, ph/2)
+            qp.scale(k, -k)
+            qp.translate(-(x0+x1)/2, -(y0+y1)/2)
+            for kind, data, color in self.shapes:
+                pen = QPen(QColor('gray' if self.greyed else color))
+                pen.setCosmetic(True)   # Line width in pixels, not mm
+                qp.setPen(pen)
+                if kind == 'poly':
+                    path = QPainterPath()
+                    path.addPolygon(QPolygonF([QPointF(x, y) for x, y in data]))
+                    path.closeSubpath()
+                    qp.drawPath(path)
+                elif kind == 'circle':
+                    x, y, r = data
+                    qp.drawEllipse(QRectF(x-r, y-r, 2*r, 2*r))
+                else:
+                    qp.setBrush(pen.color())
+                    qp.drawEllipse(QPointF(*data), 3/k, 3/k)
+                    qp.setBrush(Qt.NoBrush)
+            qp.restore()
+        self.drawMs = (time.perf_counter() - t0)*1000  # This paint's, less the caption
+        qp.setPen(QColor('gray'))
+        qp.drawText(6, self.height()-6, self.caption())
+        qp.end()
+
+#---------------------------------------------
+class Thumb(PreviewPane):
+    '''Small pane showing one variant, params, greyed if it has
+    problems; clicking it calls onClick(params).  '''
+    def __init__(self, params, label, onClick, current=False, parent=None):
+        super().__init__(parent)
+        self.params, self.label, self.onClick = params, label, onClick
+        self.current, self.problems = current, None     # None until evaluated
+        self.setMinimumSize(120, 120)
+        self.setToolTip(label)
+        self.setCursor(Qt.PointingHandCursor)
+
+    def setResult(self, shapes, problems):
+        self.problems, self.greyed = problems, bool(problems)
+        self.setToolTip('\n'.join([self.label] + problems))
+        self.setShapes(shapes)
+
+    def caption(self):
+        return self.label if self.problems is not None else self.label + ' ...'
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.current:        # Frame the variant that is the current design
+            qp = QPainter(self)
+            qp.setPen(QPen(QColor('blue'), 3))
+            qp.drawRect(self.rect().adjusted(1, 1, -2, -2))
+            qp.end()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.onClick(self.params)
+
+class ExploreWindow(QWidget):
+    '''Window showing thumbnails of variants of a design, varying one
+    or two of its parameters around their current values.  kind is an
+    explore.kinds name.  spinboxes is a dict of the main window's
+    QSpinBoxes by parameter name; they give the current values and
+    ranges, clicking a thumbnail sets them to its values, and the grid
+    follows their changes.  '''
+    def __init__(self, kind, spinboxes, axes, step=1, span=2, parent=None):
+        from explore import Explorer
+        super().__init__(parent)
+        self.kind, self.spinboxes, self.thumbs = kind, spinboxes, {}
+        self.explorer = Explorer()
+        self.setWindowTitle('Explore')
+        names = list(spinboxes)
+        self.xBox, self.yBox = QComboBox(), QComboBox()
+        self.xBox.addItems(names)
+        self.yBox.addItems(['-'] + names)
+        self.xBox.setCurrentText(axes[0])
+        self.yBox.setCurrentText(axes[1] if len(axes) > 1 else '-')
+        self.stepBox, self.spanBox = QSpinBox(), QSpinBox()
+        self.stepBox.setRange(1, 100);  self.stepBox.setValue(step)
+        self.spanBox.setRange(1, 4);    self.spanBox.setValue(span)
+        controls = QHBoxLayout()
+        for w in (QLabel('Vary'), self.xBox, QLabel('and'), self.yBox,
+                  QLabel('step'), self.stepBox, QLabel('each side'), self.spanBox):
+            controls.addWidget(w)
+        controls.addStretch()
+        self.status = QLabel('')
+        self.grid = QGridLayout()
+        outer = QVBoxLayout(self)
+        outer.addLayout(controls)
+        outer.addLayout(self.grid)
+        outer.addWidget(self.status)
+        # Restart on any change, once things settle
+        self.restartTimer = QTimer(self)
+        self.restartTimer.setSingleShot(True)
+        self.restartTimer.setInterval(100)
+        self.restartTimer.timeout.connect(self.restart)
+        later = lambda *args: self.restartTimer.start()
+        for w in (self.xBox, self.yBox):
+            w.currentIndexChanged.connect(later)
+        for w in [self.stepBox, self.spanBox] + list(spinboxes.values()):
+            w.valueChanged.connect(later)
+        # Collect finished variants while the grid stays responsive
+        self.pollTimer = QTimer(self)
+        self.pollTimer.timeout.connect(self.collect)
+
+    def restart(self):
+        '''Lay out a new grid around the current values and start
+        evaluating its variants, nearest the center first.  '''
+        from explore import variantGrid
+        if not self.isVisible(): return
+        for th in self.thumbs.values():
+            th.deleteLater()
+        x, y = self.xBox.currentText(), self.yBox.currentText()
+        y = None if y in ('-', x) else y
+        span = self.spanBox.value()
+        center = {k: sb.value() for k, sb in self.spinboxes.items()}
+        self.thumbs, cells = {}, []
+        for i, j, v in variantGrid(center, x, y, span, self.stepBox.value()):
+            label = ' '.join('{}={}'.format(k, v[k]) for k in (x, y) if k)
+            th = Thumb(v, label, self.adopt, v == center)
+            self.grid.addWidget(th, j, i)
+            self.thumbs[(i, j)] = th
+            out = [k for k, sb in self.spinboxes.items() if not sb.minimum() <= v[k] <= sb.maximum()]
+            if out:
+                th.setResult([], ['{} out of range'.format(', '.join(out))])
+            else:
+                cells.append(((i, j), v))
+        cj = span if y else 0
+        cells.sort(key=lambda c: max(abs(c[0][0]-span), abs(c[0][1]-cj)))
+        self.t0, self.total, self.left = time.perf_counter(), len(cells), len(cells)
+        self.explorer.start(self.kind, cells)
+        self.pollTimer.start(30)
+
+    def collect(self):
+        for key, shapes, probs in self.explorer.poll():
+            self.thumbs[key].setResult(shapes, probs)
+            self.left -= 1
+        self.status.setText('{} of {} variants done, {:.0f} ms'.format(
+            self.total-self.left, self.total, (time.perf_counter()-self.t0)*1000))
+        if not self.left: self.pollTimer.stop()
+
+    def adopt(self, params):
+        '''Set the main window's spinboxes to params.'''
+        for k, v in params.items():
+            self.spinboxes[k].setValue(v)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.restartTimer.start()
+
+    def closeEvent(self, event):
+        self.pollTimer.stop()
+        self.explorer.close()
+        super().closeEvent(event)
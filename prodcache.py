@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+
+# prodcache.py, on-disk cache of produced .scad files.  Each entry is
+# keyed by a hash of the script name, its parameter values, level of
+# detail, writer settings, and the generator version (a hash of the
+# generator modules' source, so editing them invalidates old entries).
+# The GUIs look up each parameter set before building it; a hit just
+# copies the cached text into gear1.scad, legs1.scad, etc.  batch.py
+# does the same per row with its --cache option.  Entries hold plain
+# .scad text, whichever way they were written.  If PRODCACHE_STL is
+# set and openscad is on the PATH, each new entry also gets an STL,
+# copied alongside the .scad on hits.  When the cache grows past its
+# size limit, least recently used entries (.scad and STL together) are
+# deleted, down to 90% of the limit, so that the next few stores don't
+# each have to list the whole cache again.
+
+# Environment settings:
+#   PRODCACHE=0          turn the cache off
+#   PRODCACHE_DIR=dir    cache directory (default ~/.cache/gearLegs)
+#   PRODCACHE_MB=n       size limit, MB (default 200)
+#   PRODCACHE_STL=1      also make and cache STL files
+
+# Usage: ./prodcache.py stats    prints entry count and size
+#        ./prodcache.py purge [MB]  deletes all entries, or LRU ones
+#                                   until the cache is within MB
+
+import gzip, json, os, shutil, subprocess, sys, tempfile, threading
+from hashlib import sha256
+
+enabled = os.environ.get('PRODCACHE', '1') != '0'
+cacheDir = os.path.expanduser(os.environ.get('PRODCACHE_DIR') or '~/.cache/gearLegs')
+maxBytes = int(float(os.environ.get('PRODCACHE_MB', '200'))*2**20)
+makeSTL = bool(os.environ.get('PRODCACHE_STL'))
+hits = misses = 0
+lock = threading.Lock()
+cachedBytes = None      # Cache size when last counted, plus what was stored since
+# Modules whose source makes up the generator version: the geometry
+# and writers, plus batch.py (its makers' defaults) and legfit.py (its
+# fits), since batch keys hold rows as given, before either applies
+sources = ('gearcore.py', 'tooth.py', 'scadtools.py', 'scadwriter.py', 'outline.py',
+           'batch.py', 'legfit.py')
+_version = None
+
+#---------------------------------------------
+def version():
+    '''Return a hash of the generator modules' source.'''
+    global _version
+    if _version is None:
+        h, here = sha256(), os.path.dirname(os.path.abspath(__file__))
+        for name in sources:
+            with open(os.path.join(here, name), 'rb') as fi:
+                h.update(fi.read())
+        _version = h.hexdigest()[:16]
+    return _version
+
+def key(script, params, lod=None):
+    '''Return the cache key for script's output for params (a dict)
+    at level of detail lod (a name, or None).  '''
+    from scadwriter import placesDefault, minifyDefault
+    blob = json.dumps([script, params, lod, placesDefault, minifyDefault, version()],
+                      sort_keys=True)
+    return sha256(blob.encode()).hexdigest()
+
+def entryPath(k, ext='.scad'):
+    return os.path.join(cacheDir, k[:2], k + ext)
+
+#---------------------------------------------
+def fetch(k, dest):
+    '''If entry k is cached, write its text to dest (via writeAtomic,
+    so gzipped if dest ends in .gz, and left alone if unchanged), copy
+    any cached STL beside it, and return True if dest was written or
+    False if not.  Return None if entry k isn't cached.  '''
+    global hits, misses
+    from autoprod import writeAtomic
+    path = entryPath(k)
+    try:
+        with open(path) as fi:
+            text = fi.read()
+    except OSError:
+        with lock: misses += 1
+        return None
+    with lock: hits += 1
+    os.utime(path)          # Mark it recently used
+    stl = entryPath(k, '.stl')
+    if os.path.exists(stl):
+        os.utime(stl)
+        shutil.copyfile(stl, os.path.splitext(dest.replace('.scad.gz', '.scad'))[0] + '.stl')
+    return writeAtomic(dest, text)
+
+def store(k, src):
+    '''Copy produced file src (.scad text, or gzipped if src ends in
+    .gz) into the cache as entry k, uncompressed; also make an STL of
+    it, if makeSTL is set and openscad is available.  Then evict old
+    entries if the cache is too big.  The cache is listed only when
+    first stored to and when evicting; in between, its size is kept
+    up to date by adding the sizes of stored files.  '''
+    global cachedBytes
+    path, stl = entryPath(k), entryPath(k, '.stl')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fo, (gzip.open if src.endswith('.gz') else open)(src, 'rb') as fi:
+            shutil.copyfileobj(fi, fo)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp): os.unlink(tmp)
+        raise
+    if makeSTL and shutil.which('openscad'):
+        subprocess.run(['openscad', '-o', stl, path],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    with lock:
+        if cachedBytes is None:
+            cachedBytes = sum(f[1] for f in entries())
+        else:
+            cachedBytes += sum(os.path.getsize(f) for f in (path, stl) if os.path.exists(f))
+        over = cachedBytes > maxBytes
+    if over:
+        evict(0.9*maxBytes)
+
+def entries():
+    '''Return a list of (mtime, bytes, path) for files in the cache.'''
+    out = []
+    if not os.path.isdir(cacheDir): return out
+    for sub in os.listdir(cacheDir):
+        d = os.path.join(cacheDir, sub)
+        if not os.path.isdir(d): continue
+        for name in os.listdir(d):
+            p = os.path.join(d, name)
+            try:
+                st = os.stat(p)
+            except OSError:     # Deleted by another process meanwhile
+                continue
+            out.append((st.st_mtime, st.st_size, p))
+    return out
+
+def evict(limit):
+    '''Delete least recently used entries, each with all its files,
+    until the cache holds at most limit bytes.  Return the number of
+    files deleted.  '''
+    global cachedBytes
+    groups = {}                 # Entry key -> [latest mtime, bytes, paths]
+    for mtime, size, path in entries():
+        g = groups.setdefault(os.path.basename(path).split('.')[0], [0, 0, []])
+        g[0], g[1] = max(g[0], mtime), g[1] + size
+        g[2].append(path)
+    total, n = sum(g[1] for g in groups.values()), 0
+    for mtime, size, paths in sorted(groups.values()):
+        if total <= limit: break
+        for path in paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            n += 1
+        total -= size
+    with lock: cachedBytes = total
+    return n
+
+def stats():
+    '''Return a dict of cache directory, entry count, bytes, limit, and
+    this process's hits and misses.  '''
+    files = entries()
+    return {'dir': cacheDir, 'entries': sum(f[2].endswith('.scad') for f in files),
+            'bytes': sum(f[1] for f in files), 'limit': maxBytes, 'hits': hits, 'misses': misses}
+
+#---------------------------------------------
+if __name__ == '__main__':
+    cmd = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    if cmd == 'stats':
+        s = stats()
+        print ('{} entries, {:.1f} of {:.0f} MB in {}'.format(
+            s['entries'], s['bytes']/2**20, s['limit']/2**20, s['dir']))
+    elif cmd == 'purge':
+        limit = float(sys.argv[2])*2**20 if len(sys.argv) > 2 else 0
+        print ('Deleted {} files'.format(evict(limit)))
+    else:
+        print ('Usage: ./prodcache.py stats | purge [MB]')
+        sys.exit(1)
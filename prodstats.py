@@ -0,0 +1,95 @@
+# prodstats.py, opt-in timing of the stages of Produce: building the
+# model (geometry plus SolidPython tree), and rendering it to SCAD
+# text as the file is written.  For each Produce it keeps wall and CPU times
+# per stage, the number of nodes in the CSG tree, and output byte
+# counts.  The latest summary is kept in prodstats.last, for the GUI
+# status line; each Produce can also be appended as one JSON line to
+# a log file, and run under cProfile.
+
+# Environment settings:
+#   PRODSTATS=1           turn on stats
+#   PRODSTATS_LOG=path    turn on stats, and append JSON lines to path
+#   PRODSTATS_PROFILE=dir turn on stats, and cProfile each Produce,
+#                         dumping stats to dir/<script>-<n>.prof
+# The GUIs' Profile button toggles cProfile capture (and stats) too.
+
+import json, os, threading, time
+from contextlib import contextmanager
+
+logPath = os.environ.get('PRODSTATS_LOG')
+profiling = 'PRODSTATS_PROFILE' in os.environ
+profileDir = os.environ.get('PRODSTATS_PROFILE') or 'prodProfiles'
+enabled = bool(os.environ.get('PRODSTATS') or logPath or profiling)
+last = ''               # Summary line of latest Produce
+nProfiled = 0
+lock = threading.Lock()
+
+#---------------------------------------------
+def countNodes(obj):
+    '''Return the number of nodes in SolidPython tree obj, counting a
+    node once per place it appears.  '''
+    n, todo = 0, [obj]
+    while todo:
+        o = todo.pop()
+        n += 1
+        todo.extend(o.children)
+    return n
+
+#---------------------------------------------
+class ProduceStats:
+    '''Context manager collecting stats for one Produce of script.
+    Time stages with stage(name); note counts with note(**counts).
+    Does nothing much unless prodstats.enabled is true.    '''
+    def __init__(self, script):
+        self.script = script
+        self.stages, self.counts = [], {}
+        self.prof = None
+
+    def __enter__(self):
+        if profiling:
+            import cProfile
+            self.prof = cProfile.Profile()
+            self.prof.enable()
+        self.t0, self.c0 = time.perf_counter(), time.process_time()
+        return self
+
+    @contextmanager
+    def stage(self, name):
+        t0, c0 = time.perf_counter(), time.process_time()
+        yield
+        self.stages.append((name, time.perf_counter()-t0, time.process_time()-c0))
+
+    def note(self, **counts):
+        if enabled: self.counts.update(counts)
+
+    def __exit__(self, *exc):
+        global last, nProfiled
+        if self.prof: self.prof.disable()
+        if not enabled or exc[0]: return False
+        wall, cpu = time.perf_counter()-self.t0, time.process_time()-self.c0
+        rec = {'script': self.script, 'time': time.time(), 'wall': wall, 'cpu': cpu,
+               'stages': {n: {'wall': w, 'cpu': c} for n, w, c in self.stages}}
+        rec.update(self.counts)
+        with lock:
+            if self.prof:
+                os.makedirs(profileDir, exist_ok=True)
+                nProfiled += 1
+                path = os.path.join(profileDir, '{}-{}.prof'.format(self.script, nProfiled))
+                self.prof.dump_stats(path)
+                rec['profile'] = path
+            if logPath:
+                with open(logPath, 'a') as fo:
+                    fo.write(json.dumps(rec) + '\n')
+            last = self.summary(wall)
+        return False
+
+    def summary(self, wall):
+        parts = ['{} {:.1f}'.format(n, w*1000) for n, w, c in self.stages]
+        s = '{:.1f} ms: {}'.format(wall*1000, ', '.join(parts))
+        if 'nodes' in self.counts: s += ' | {} nodes'.format(self.counts['nodes'])
+        if 'bytes' in self.counts: s += ', {:.1f} KB'.format(self.counts['bytes']/1024)
+        if 'lod' in self.counts: s += ', ' + self.counts['lod']
+        if self.counts.get('cached'): s += ', from cache'
+        if 'cacheHits' in self.counts:
+            s += ', cache {} hit {} miss'.format(self.counts['cacheHits'], self.counts['cacheMisses'])
+        return s
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+# scadtools.py, helpers shared by the gear and leg generators for
+# emitting compact OpenSCAD code, and for timing OpenSCAD on it.
+
+# Instanced output: rather than writing nT rotated copies of a tooth
+# into the .scad file, ringOf() writes the tooth once, as an OpenSCAD
+# module, plus a module with a for loop that rotates the tooth into
+# place nT times.  Module definitions ride along with the SolidPython
+# tree (as InlineModule nodes) and land at the top of the rendered
+# file, the same way SolidPython handles use<> and include<> lines.
+
+import os, shutil, subprocess, tempfile, time
+from math import cos, pi, sin
+from hashlib import md5
+from solid.solidpython import OpenSCADObject, IncludedOpenSCADObject, indent
+
+#---------------------------------------------
+class InlineModule(IncludedOpenSCADObject):
+    '''A call of OpenSCAD module name, whose definition text is carried
+    along in the object and written once at the top of the file by
+    scad_render, however many times the module gets called.  '''
+    def __init__(self, name, definition, params=None):
+        self.include_string = definition
+        OpenSCADObject.__init__(self, name, params or {})
+
+#---------------------------------------------
+def unionOf(children):
+    '''Return one union node having all of children (SolidPython
+    objects) as direct children.  Children that are plain unions
+    themselves are merged in.  Gathering n parts this way is O(n) and
+    one level deep, where a chain of asm += part builds a new union per
+    part, copying every earlier part into it (or, in older SolidPython
+    versions, nesting one level deeper per part).  '''
+    from solid import union
+    asm = union()
+    for c in children:
+        if type(c) is union and not c.modifier:
+            asm.add(c.children)
+        else:
+            asm.add(c)
+    return asm
+
+#---------------------------------------------
+def ringOf(unit, count, start=0, prefix='ring'):
+    '''Return an OpenSCAD module call that places count copies of unit
+    around the z axis, copy i rotated by start + i*360/count degrees.
+    unit is a SolidPython object, or a string of SCAD code which may
+    use loop index i.  Rings of the same unit and count share one
+    module definition; start is passed to it as a parameter.  '''
+    body = unit._render() if isinstance(unit, OpenSCADObject) else '\n'+unit
+    key = md5('{} {}'.format(count, body).encode()).hexdigest()[:10]
+    uname, rname = '{}_{}_unit'.format(prefix, key), '{}_{}'.format(prefix, key)
+    definition = ('module {}(i) {{{}\n}}\n'.format(uname, indent(body)) +
+                  'module {}(a0) {{\n\tfor (i = [0:{}]) rotate(a0 + i*{:.10f}) {}(i);\n}}\n'
+                  .format(rname, count-1, 360.0/count, uname))
+    return InlineModule(rname, definition, {'a0': float(start)})
+
+#---------------------------------------------
+def openscadTime(path, export='csg'):
+    '''Return the number of seconds OpenSCAD takes to load the .scad
+    file at path and export it in the given format, or None if no
+    openscad program is on the PATH.  The default CSG export parses
+    and evaluates the file without a CGAL render.  '''
+    exe = shutil.which('openscad')
+    if not exe: return None
+    fd, out = tempfile.mkstemp(suffix='.'+export)
+    os.close(fd)
+    try:
+        t0 = time.perf_counter()
+        subprocess.run([exe, '-o', out, path], check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return time.perf_counter() - t0
+    finally:
+        os.unlink(out)
+
+#---------------------------------------------
+def instanceReport(nTs=(20, 100, 250, 500), gmodule=1, outDir=None):
+    '''Print .scad file sizes (and OpenSCAD load times, if openscad is
+    available) of flattened versus instanced output, for spurGear gears
+    and for gear2 assemblies (3 planets) with each sun tooth count in
+    nTs.  Files are written as the GUIs and batch.py write them, via
+    scadwriter.writeScad.  '''
+    from scadwriter import writeScad
+    from tooth import spurGear
+    from gearcore import GearAssembly
+    def gear2Asm(nT, inst):
+        ap = GearAssembly(20, 25, 31, 10*gmodule, 3, nT//3, nT)
+        ap.instanced = inst
+        return ap.makeAssembly()
+    outDir = outDir or tempfile.mkdtemp()
+    def secs(t): return '{:9.3f}'.format(t) if t is not None else '{:>9}'.format('-')
+    print ('{:>8} {:>5} {:>10} {:>10} {:>6} {:>9} {:>9}'.format(
+        'model', 'nT', 'flat B', 'inst B', 'ratio', 'flat s', 'inst s'))
+    for model, make in (('spurGear', lambda nT, inst: spurGear(nT, gmodule, instanced=inst)),
+                        ('gear2', gear2Asm)):
+        for nT in nTs:
+            res = []
+            for inst in (False, True):
+                path = os.path.join(outDir, '{}-{}{}.scad'.format(model, nT, 'i' if inst else 'f'))
+                writeScad(path, make(nT, inst))
+                res.append((os.path.getsize(path), openscadTime(path)))
+            (fb, ft), (ib, it) = res
+            print ('{:>8} {:5} {:10} {:10} {:6.1f} {} {}'.format(
+                model, nT, fb, ib, fb/ib, secs(ft), secs(it)))
+
+#---------------------------------------------
+def unionReport(nTs=(20, 100, 400, 1600, 3200), m=23, outDir=None):
+    '''Print times to build and write (via scadwriter.writeScad), tree
+    depth, and .scad size of a gear of nT teeth (each nT in nTs),
+    gathered by a chain of += versus by unionOf.  '''
+    from functools import reduce
+    from solid import cube, rotate, translate
+    from scadwriter import writeScad
+    outDir = outDir or tempfile.mkdtemp()
+    def depth(o): return 1 + max([depth(c) for c in o.children], default=0)
+    print ('{:>5} {:>8} {:>9} {:>9} {:>6} {:>9}'.format(
+        'nT', 'way', 'build s', 'write s', 'depth', 'bytes'))
+    for nT in nTs:
+        for way, gather in (('+=', lambda parts: reduce(lambda a, b: a + b, parts)),
+                            ('unionOf', unionOf)):
+            t0 = time.perf_counter()
+            teeth = [translate([10*cos(2*i*pi/nT), 10*sin(2*i*pi/nT), 0])(
+                rotate(i*360/nT)(cube([1, 0.2, 1.2]))) for i in range(nT)]
+            asm = gather(teeth)
+            t1 = time.perf_counter()
+            path = os.path.join(outDir, 'union{}.scad'.format(nT))
+            if os.path.exists(path): os.unlink(path)    # Write it, not skip it as unchanged
+            writeScad(path, asm)
+            t2 = time.perf_counter()
+            print ('{:5} {:>8} {:9.4f} {:9.4f} {:6} {:9}'.format(
+                nT, way, t1-t0, t2-t1, depth(asm), os.path.getsize(path)))
+
+#---------------------------------------------
+def armReport(params=((40,10,-30,-100,40,-20), (60,30,-5,-80,20,-30)),
+              tols=(0.1, 0.01, 0.001), cylSegments=90, outDir=None):
+    '''Print vertex counts, and OpenSCAD preview (CSG export) and render
+    (STL export) times if openscad is available, of CSG versus
+    analytic-polygon legs, for each ArmParams parameter set in params
+    and, for polygons, each arc tolerance in tols.  For the CSG form,
+    count $fn vertices per cylinder and 8 per cube.  Files are written
+    via scadwriter.writeScad.  '''
+    from scadwriter import writeScad
+    from gearcore import ArmParams
+    outDir = outDir or tempfile.mkdtemp()
+    header = '$fn = {};'.format(cylSegments)
+    def secs(t): return '{:9.3f}'.format(t) if t is not None else '{:>9}'.format('-')
+    print ('{:>26} {:>7} {:>8} {:>9} {:>9}'.format('p,q,s,t,u,w', 'tol', 'vertices', 'preview s', 'render s'))
+    for k, prm in enumerate(params):
+        ap = ArmParams(*prm)
+        for tol in (None,) + tuple(tols):
+            ap.analytic, ap.tol = tol is not None, tol
+            nv = len(ap.getArmOutline()) if ap.analytic else 4*cylSegments + 2*8
+            path = os.path.join(outDir, 'arm{}-{}.scad'.format(k, tol))
+            writeScad(path, ap.getOblongArm(), header)
+            print ('{:>26} {:>7} {:8} {} {}'.format(','.join(map(str, prm)),
+                    'CSG' if tol is None else tol, nv,
+                    secs(openscadTime(path)), secs(openscadTime(path, 'stl'))))
+
+#---------------------------------------------
+if __name__ == '__main__':
+    unionReport()
+    instanceReport()
+    armReport()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+# scadwriter.py, streaming .scad writer for SolidPython trees.  Where
+# scad_render builds the whole text of a model as one string (nested
+# strings, really, one per level of the tree), emit() walks the tree
+# without recursion and yields text a node at a time, so writeScad can
+# send it straight to a file; long point lists go out in pieces too.
+# All numbers go through one quantization policy: floats are rounded
+# to placesDefault decimal places, with trailing zeros dropped
+# (-242.4028853967 becomes -242.4029 at 4 places).
+# Optionally, whitespace and indentation are left out (minify), and
+# output is gzip-compressed (for paths ending in .gz; OpenSCAD can't
+# read those, but batch archives can hold many more).
+
+# Environment settings, the default policy for all scripts:
+#   SCAD_PLACES=n    decimal places for floats (default 4)
+#   SCAD_MINIFY=1    leave out indentation and optional whitespace
+
+# Usage: ./scadwriter.py  prints output sizes and peak memory of
+# scad_render and of writeScad, for some large models.
+
+import os, re, tempfile, tracemalloc
+import numpy as np
+
+placesDefault = int(os.environ.get('SCAD_PLACES', '4'))
+minifyDefault = bool(os.environ.get('SCAD_MINIFY'))
+
+#---------------------------------------------
+def number(v, places):
+    '''Return float v as text, rounded to places decimals, without
+    trailing zeros.  '''
+    s = '{:.{}f}'.format(v, places)
+    if '.' in s:
+        s = s.rstrip('0').rstrip('.')
+    return '0' if s == '-0' else s
+
+def value(v, places, sep):
+    '''Return Python value v as OpenSCAD text.'''
+    if isinstance(v, (bool, np.bool_)):
+        return 'true' if v else 'false'
+    if isinstance(v, (int, np.integer)):
+        return str(int(v))
+    if isinstance(v, (float, np.floating)):
+        return number(v, places)
+    if isinstance(v, str):
+        return '"{}"'.format(v.replace('\\', '\\\\').replace('"', '\\"'))
+    if isinstance(v, np.ndarray):
+        v = v.tolist()
+    return '[' + sep.join([value(x, places, sep) for x in v]) + ']'
+
+def keyword(k):
+    '''Return OpenSCAD name for SolidPython parameter name k.'''
+    from solid.solidpython import _unsubbed_keyword
+    return _unsubbed_keyword(k)
+
+def pieces(v, places, sep, size=500):
+    '''Yield the text of value v in pieces of up to size list items.'''
+    if isinstance(v, np.ndarray):
+        v = v.tolist()
+    if not isinstance(v, (list, tuple)) or len(v) <= size:
+        yield value(v, places, sep)
+        return
+    yield '['
+    for i in range(0, len(v), size):
+        yield (sep if i else '') + sep.join([value(x, places, sep) for x in v[i:i+size]])
+    yield ']'
+
+def head(obj, places, mini):
+    '''Yield the call of obj, without children or terminator.'''
+    sep, eq = (',', '=') if mini else (', ', ' = ')
+    pars = obj.params
+    keys = sorted(k for k in pars if isinstance(k, int))
+    keys += sorted(k for k in pars if not isinstance(k, int))
+    yield obj.modifier + keyword(obj.name) + '('
+    first = True
+    for k in keys:
+        if pars[k] is None: continue
+        yield ('' if first else sep) + ('' if isinstance(k, int) else keyword(k) + eq)
+        yield from pieces(pars[k], places, sep)
+        first = False
+    yield ')'
+
+def includes(obj):
+    '''Return the include strings of IncludedOpenSCADObjects (like
+    scadtools.InlineModule) in tree obj, in order first seen.  '''
+    from solid.solidpython import IncludedOpenSCADObject
+    seen, todo = {}, [obj]
+    while todo:
+        o = todo.pop()
+        if isinstance(o, IncludedOpenSCADObject):
+            seen.setdefault(o.include_string, None)
+        todo.extend(reversed(o.children))
+    return list(seen)
+
+#---------------------------------------------
+def emit(obj, header='', places=None, minify=None):
+    '''Yield the .scad text of SolidPython tree obj, a node at a time,
+    after header and any include strings.  places and minify default
+    to placesDefault and minifyDefault.  SolidPython hole() and part()
+    nodes are not supported.  '''
+    places = placesDefault if places is None else places
+    mini = minifyDefault if minify is None else minify
+    if header:
+        yield header if header.endswith('\n') else header + '\n'
+    # Include strings come pre-rendered; quantize their numbers too
+    yield re.sub(r'-?\d+\.\d+', lambda m: number(float(m.group()), places),
+                 ''.join(includes(obj))) + '\n'
+    todo = [(obj, 0)]
+    while todo:
+        o, depth = todo.pop()
+        if isinstance(o, str):          # Closing brace
+            yield o
+            continue
+        if o.is_hole or o.name in ('hole', 'part'):
+            raise ValueError('scadwriter does not handle hole() or part()')
+        pre = '' if mini else '\n' + '\t'*depth
+        if any(isinstance(v, (list, tuple, np.ndarray)) and len(v) > 500
+               for v in o.params.values()):   # Long parameters; send in pieces
+            yield pre
+            yield from head(o, places, mini)
+            call = ''
+        else:
+            call = pre + ''.join(head(o, places, mini))
+        if o.children:
+            yield call + ('{' if mini else ' {')
+            todo.append((pre + '}', depth))
+            todo.extend((c, depth+1) for c in reversed(o.children))
+        else:
+            yield call + ';'
+
+def writeScad(path, obj, header='', places=None, minify=None):
+    '''Stream the .scad text of obj to file path, atomically, and
+    gzipped if path ends in .gz; via autoprod.writeAtomic, so an
+    unchanged file is left alone.  Return True if the file was
+    written.  '''
+    from autoprod import writeAtomic
+    return writeAtomic(path, emit(obj, header, places, minify))
+
+#---------------------------------------------
+def report():
+    '''Print output bytes and peak Python memory, for scad_render plus
+    a file write, and for writeScad plain, minified, and gzipped, for
+    some large models.  '''
+    from solid import scad_render
+    from tooth import spurGear
+    from gearcore import GearAssembly, ArmParams
+    import autoprod, contextlib, io    # Imported here, not while measuring
+    with contextlib.redirect_stdout(io.StringIO()):
+        models = [('spurGear 500', spurGear(500, 1), ''),
+                  ('gear2 n=8', GearAssembly(20, 25, 31, 23, 8, 37, 53).makeAssembly(), '$fn = 90;'),
+                  ('legs CSG', ArmParams(40, 10, -30, -100, 40, -20).getOblongArm(), '$fn = 90;')]
+    outDir = tempfile.mkdtemp()
+    def renderFile(path, obj, header):
+        with open(path, 'w') as fo:
+            fo.write(scad_render(obj, file_header=header))
+    ways = [('scad_render', renderFile, '.scad'),
+            ('writeScad', lambda p, o, h: writeScad(p, o, h, minify=False), '.scad'),
+            ('  minified', lambda p, o, h: writeScad(p, o, h, minify=True), '.scad'),
+            ('  min+gzip', lambda p, o, h: writeScad(p, o, h, minify=True), '.scad.gz')]
+    print ('{:14} {:12} {:>10} {:>10}'.format('model', 'writer', 'bytes', 'peak KB'))
+    for name, obj, header in models:
+        for wname, write, ext in ways:
+            path = os.path.join(outDir, wname.strip() + ext)
+            tracemalloc.start()
+            write(path, obj, header)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print ('{:14} {:12} {:10} {:10.1f}'.format(name, wname, os.path.getsize(path), peak/1024))
+
+#---------------------------------------------
+if __name__ == '__main__':
+    report()
@@ -6,7 +6,9 @@
 # Whenever you click Produce, this program will output a file
 # 'legs1.scad' with .scad code modeling an object.  If AutoProd is
 # green (turned on) Produce will occur whenever you change a value in
-# a spinbox or click Produce.
+# a spinbox or click Produce.  The preview pane below the spinboxes
+# is redrawn from the in-memory geometry at every change; it never
+# waits on .scad output.
 
 # Note, although openscad's 2nd orthogonal view shows the y axis as
 # positive-up on the screen, y axis coordinates seem to act
@@ -15,15 +17,12 @@
 # comments, "top" and "up" referring to higher on the screen and
 # more-negative y values.
 
-import sys
-from math import sqrt
-from PyQt5.QtWidgets import QGridLayout, QSpinBox, QLabel
-from PyQt5.QtWidgets import QApplication, QWidget, QPushButton
-
-from solid import color, cube, cylinder, text
-from solid import scad_render_to_file, translate
-from solid.utils import up, down, left, right, forward, back
-from solid.utils import Black, Cyan, Green, Red, Magenta
+import os, sys, time
+from autoprod import AutoProducer
+from scadwriter import writeScad
+import prodcache, prodstats
+from prodstats import ProduceStats, countNodes
+from gearcore import ArmParams, DRAFT, FINAL
 
 #---------------------------------------------
 class CallData:
@@ -32,9 +31,12 @@ class CallData:
     def __init__(self):
         pass
     autoProduce = False
+    producer = None             # AutoProducer that runs produceOutput
+    preview = None              # PreviewPane drawing the geometry
+    exploreWin = None           # ExploreWindow, made at first Explore click
     #---------------------------------------------
     @staticmethod
-    def buttonLabels():    return ['Quit', 'Produce', 'AutoProd']
+    def buttonLabels():    return ['Quit', 'Produce', 'AutoProd', 'Profile', 'Explore']
     #---------------------------------------------
     @classmethod
     def makeClickFunc(c, bu,bun):
@@ -56,8 +58,29 @@ class CallData:
         data = [ap.p, ap.s, ap.t, ap.q, ap.u, ap.w]
         data[slN] = v
         ap.p, ap.s, ap.t, ap.q, ap.u, ap.w = data
+        c.showPreview(ap)
         # At any spinbox change, run Produce if AutoProd is on
-        if c.autoProduce:  produceOutput(ap)
+        if c.autoProduce:  c.producer.request(ap)
+    #---------------------------------------------
+    @classmethod
+    def showPreview(c, ap):
+        '''Redraw the preview pane from ap's geometry'''
+        if c.preview is None: return
+        t0 = time.perf_counter()
+        try:
+            shapes = ap.previewShapes()
+        except (ValueError, ZeroDivisionError, FloatingPointError):
+            shapes = []
+        c.preview.setShapes(shapes, (time.perf_counter()-t0)*1000)
+    #---------------------------------------------
+    @classmethod
+    def explore(c, base):
+        '''Show a grid of variants of base's design, to pick from'''
+        if c.exploreWin is None:
+            from previewpane import ExploreWindow
+            c.exploreWin = ExploreWindow('legs', base.spinboxes, ('u', 'w'), step=5)
+        c.exploreWin.show()
+        c.exploreWin.raise_()
     #---------------------------------------------
     @classmethod
     def on_buttonClick(c, bu, bun):
@@ -69,105 +92,56 @@ class CallData:
         '''
         bt = c.buttonLabels()[bun]
         if   bt=='Quit':      sys.exit()
-        elif bt=='Produce':   produceOutput(bu.parentWidget().armParam)
+        elif bt=='Produce':   c.producer.request(bu.parentWidget().armParam, now=True)
         elif bt=='AutoProd':
             c.autoProduce = not c.autoProduce
             color = 'green' if c.autoProduce else 'khaki'
             bu.setStyleSheet('QPushButton {background-color: %s;}'%color)
+        elif bt=='Explore':   c.explore(bu.parentWidget())
+        elif bt=='Profile':     # Toggle cProfile capture, and stats
+            prodstats.profiling = not prodstats.profiling
+            prodstats.enabled = prodstats.enabled or prodstats.profiling
+            color = 'green' if prodstats.profiling else 'khaki'
+            bu.setStyleSheet('QPushButton {background-color: %s;}'%color)
         else:
             print ('B{} {} {} click'.format(bun, bt, bu.text()))
 #---------------------------------------------
-class ArmParams:
-    '''Class with data and methods to make an oval arm.
-
-    Let C(r,x,y) be a circle of radius r with center (x,y).  In this
-    program, an oval Arm has parameters p > q > 0 > s > t and u > 0 > w
-    and is bounded by arcs of four circles: an upper arc of C(p-s, 0,
-    p); a lower arc of C(q-t, 0, t); a left arc of C(rl, w, vl); and a
-    right arc of C(rr, u, vr), with rr, rl, vr, vl such that the small
-    circles are tangent to the lens intersection of the large circles.
-    '''
-    def __init__(self, p,q,s,t,u,w):
-        self.ready = False
-        self.p = p
-        self.q = q
-        self.s = s
-        self.t = t
-        self.u = u
-        self.w = w
-        #print ('p {}  q {}  s {}  t {}  u {}  w {}'.format(p,q,s,t,u,w))
-
-    def solveArcArc(self, p,q,s,t,u):
-        '''Solve for a circle R tangent to two arcs C1 and C2.  Return radius,
-        v, tphi, tplo, ie, the radius of R, its center y coordinate, and
-        two tangency points, tp hi and tp lo.
-
-        The arcs are portions of circles with radii r1 = p-s and r2 =
-        q-t, with centers at (0,p) and (0,t) respectively, while
-        circle R has radius r and center (u,v).  We are given p, q, s,
-        t, u with p > q > 0 > s > t.  r and v are unknowns.  Method:
-        Let radii from (0,p) and (0,t) intersect at (u,v).  Let a and
-        b be the lengths of the radii left over after intersection.
-        So a = r1 - sqrt(u^2+(p-v)^2) and b = r2 - sqrt(u^2+(t-v)^2).
-        We want r = a(v0) = b(v0).  We solve using Newton iteration.
-        Note, if f(v) = c - sqrt(u^2+(d-v)^2), then f'(v) =
-        (v-d)/sqrt(u^2+(d-v)^2). Note, closed-form non-iterative
-        solutions exist but are complicated. Ref: (using p,s,t
-        differently) <https://math.stackexchange.com/q/3145832>
-        '''
-        r1, r2, uu = p-s, q-t, u*u
-        r1s, r2s = r1**2, r2**2
-        # Make initial estimate of v, halfway between y1(u) and y2(u)
-        if r1s<uu or r2s<uu: return 5,0 # u too big means no solution
-        y1u, y2u = p - sqrt(r1s-uu), t + sqrt(r2s-uu)
-        v = (y1u+y2u)/2
-        for i in range(9):     # Usually takes about 3 iterations
-            av = sqrt(uu+(p-v)**2);  ar=r1-av;  adf=(v-p)/av
-            bv = sqrt(uu+(t-v)**2);  br=r2-bv;  bdf=(v-t)/bv
-            if abs(adf-bdf) < 1e-5: break # Avoid div by 0
-            v = v + (ar-br)/(adf-bdf)
-            if abs(ar-br) < 1e-12: break
-        # Compute intersection points by similar triangles
-        r = ar; n1, n2 = r1/(r1-r), r2/(r2-r)
-        tphi = (u*n1, p-(p-v)*n1)
-        tplo = (u*n2, t+(v-t)*n2)
-        return ar, v, tphi, tplo
-
-    def getOblongArm(self):
-        '''Return a SolidPython object modeling an oblong arm (per specs in
-        ArmParams object) bounded by four arcs of circles.        '''
-        eps =  0.01
-        p,q,s,t,u,w = self.p, self.q, self.s, self.t, self.u, self.w
-        r1, r2 = p-s, q-t
-        domis, chi, dhi = 2*max(r1,r2), 1.1, -0.05
-        arc1 = back(r1+s)(cylinder(r=r1, h=1))
-        arc2 = back(q-r2)(cylinder(r=r2, h=1))
-        rl, vl, p1, p2 = self.solveArcArc(p,q,s,t,u)
-        rr, vr, p3, p4 = self.solveArcArc(p,q,s,t,w)
-        rightcircle = color(Green)(translate([u,-vl,dhi])(cylinder(r=rl,h=chi)))
-        leftcircle = color(Red) (translate([w,-vr,dhi])(cylinder(r=rr,h=chi)))
-        yrhi, yrlo, ylhi, yllo = p1[1], p2[1], p3[1], p4[1]
-        xr, xl = min(p1[0], p2[0]), max(p3[0], p4[0])
-        dominol = translate([xl-domis,-yllo, dhi])(cube([domis,yllo-ylhi,chi]))
-        dominor = translate([xr,      -yrlo, dhi])(cube([domis,yrlo-yrhi,chi]))
-        return (arc1*arc2-dominol-dominor) + rightcircle + leftcircle
-#---------------------------------------------
-def produceOutput(ap):
+def produceOutput(ap, draft=False):
+    '''Write .scad code for ap; coarse if draft, else full quality.'''
     if not ap.ready: return
-    asm = ap.getOblongArm()
-    cylSegments, version, title = 90, 1, 'legs'
-    cylSet_fn = '$fn = {};'.format(cylSegments)
+    ap.lod = DRAFT if draft else FINAL
+    version, title = 1, 'legs'
+    cylSet_fn = '$fn = {};'.format(ap.lod.hdrSegs)
     asmFile = '{}{}.scad'.format(title, version)
-    scad_render_to_file(asm, asmFile, file_header=cylSet_fn, include_orig_code=False)
-    print ('Wrote scad code to {}'.format(asmFile))
+    params = {k: getattr(ap, k) for k in ('p','q','s','t','u','w','analytic','tol')}
+    key = prodcache.key('legs', params, ap.lod.name) if prodcache.enabled else None
+    with ProduceStats('legs') as st:
+        with st.stage('cache'):  wrote = prodcache.fetch(key, asmFile) if key else None
+        if wrote is None:       # Not cached; make it
+            with st.stage('build'):  asm = ap.getOblongArm()
+            with st.stage('write'):  wrote = writeScad(asmFile, asm, cylSet_fn)
+            if key: prodcache.store(key, asmFile)
+            if prodstats.enabled:
+                st.note(nodes=countNodes(asm), bytes=os.path.getsize(asmFile), wrote=wrote, lod=ap.lod.name)
+        elif prodstats.enabled:
+            st.note(cached=True, bytes=os.path.getsize(asmFile), wrote=wrote, lod=ap.lod.name)
+    if wrote:
+        print ('Wrote {} scad code to {}'.format(ap.lod.name, asmFile))
+    else:
+        print ('No change to {}'.format(asmFile))
 #---------------------------------------------
 if __name__ == '__main__':
+    from PyQt5.QtWidgets import QGridLayout, QSpinBox, QLabel
+    from PyQt5.QtWidgets import QApplication, QWidget, QPushButton
+    from PyQt5.QtCore import QTimer
+    from previewpane import PreviewPane
     app = QApplication(sys.argv)    # Create a Qt application, first thing
     widget = QWidget()
     widget.setWindowTitle('Some design')
     widget.setStyleSheet('QGridLayout {background-color: khaki; color: lightcyan}')
     widget.setStyleSheet('QPushButton {background-color: khaki;}')
     panes = QGridLayout(widget)
+    CallData.producer = AutoProducer(produceOutput)
     p,q,s,t,u,w  = 40, 10, -30, -100, 40, -20
     aarm = ArmParams(p,q,s,t,u,w)
     # Make pushbuttons
@@ -177,10 +151,9 @@ if __name__ == '__main__':
         bu = QPushButton(txt)
         panes.addWidget(bu, 0, k) # Button in row 0, column k
         bu.clicked.connect(CallData.makeClickFunc(bu, k))
-        if txt=='AutoProd':
-            CallData.on_buttonClick(bu, k) # Toggle AutoProd on
 
     widget.armParam = aarm      # Produce needs a link to aarm
+    widget.spinboxes = {}       # Explore needs the spinboxes, by name
     spinsets = [
         # Range; Initial Value; VarName; and Legend for each spinbox
         [0,  999, p, 'p',  'Center 1 (bigger=lower)'],
@@ -197,6 +170,7 @@ if __name__ == '__main__':
         sb.valueChanged.connect(CallData.makeSpinBoxFunc(widget, sb, sn))
         sb.setRange(rlo, rhi)
         sb.setValue(rini)
+        widget.spinboxes[varn] = sb
         # Add legend, spinbox, and var name widgets into QGridLayout
         # Starting at cell (ro,0), use 1 row, 2 cols for legend
         panes.addWidget(QLabel(legend), ro, 0, 1, 2)
@@ -204,6 +178,20 @@ if __name__ == '__main__':
         panes.addWidget(QLabel(varn),   ro, 3) # var-name in cell (ro,3)
         ro += 1
 
+    # Status line, showing stage timings of the latest Produce
+    status = QLabel('')
+    panes.addWidget(status, ro, 0, 1, 4)
+    def showStats():
+        if prodstats.last != status.text(): status.setText(prodstats.last)
+    statsTimer = QTimer()
+    statsTimer.timeout.connect(showStats)
+    statsTimer.start(250)
+
+    # Preview pane, below the status line
+    CallData.preview = PreviewPane()
+    panes.addWidget(CallData.preview, ro+1, 0, 1, 4)
+    CallData.showPreview(aarm)
+
     aarm.ready = True           # Now allow Produce to occur
     widget.show()               # Show the window
     app.exec_()                 # Run the app
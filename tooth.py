@@ -12,35 +12,38 @@
 # Ref: https://www.sdp-si.com/D805/D805_PDFS/Technical/8050T034.pdf
 # Also see: https://www.thingiverse.com/thing:1919326 by Greg Frost
 
-from solid import linear_extrude, cylinder, polygon, scad_render_to_file
-from math import sqrt, pi, sin, cos, atan2
+from math import pi, cos, atan2
+from functools import lru_cache
+import numpy as np
 
 def rad(deg): return deg*pi/180.0
 def deg(rad): return rad*180.0/pi
 
-def spurGear(nT=12, gmodule=3, holeDiam=6.35, gthick=4, pressAngle=28):
-    '''Return CSG of a cylindrical spur gear having center-hole
-    diameter=holeDiam, thickness=gthick, module=gmodule, pressure
-    angle=pressAngle, #teeth=nT.  In more detail:
-
-    module: A metric gear's module (mm) is its reference diameter (its
-    pitch diameter) divided by its tooth count.  For example, a
-    module-3 gear with 30 teeth is 90 mm across.  "Circular pitch",
-    equal to pi*module, is tooth-to-tooth circumferential distance at
-    pitch diameter.  "Diametral pitch" is the number of tooth
-    intervals per inch at pitch diameter.
-
-    Pressure angle (degrees) is profile angle at pitch diameter; also
-    equals angle between normal to tooth surface and angle of force
-    when gear contact point is at the pitch diameter.
+def rotations(angles):
+    '''Return a stack of 2x2 rotation matrices, one per angle (radians)
+    in angles.  '''
+    c, s = np.cos(angles), np.sin(angles)
+    return np.stack((np.stack((c, -s), -1), np.stack((s, c), -1)), -2)
 
-    Coefficient of profile shift: [Not in this version; may add in
-    future] Use 0 if #teeth is large; as #teeth gets smaller, use a
-    larger shift to avoid tooth undercutting.  See Table 4, p. T-40 in
-    SDP-SI 8050T034.pdf
+def rotated(pl, ra):
+    '''Return points pl (an n x 2 array), rotated by ra radians, at
+    full precision; scadwriter rounds them on output.  If ra is a
+    vector of k angles, return a k x n x 2 array, with pl rotated by
+    each angle in turn, all in one shot via a stack of rotation
+    matrices.  '''
+    pl = np.asarray(pl, dtype=float)
+    rm = rotations(np.atleast_1d(ra))
+    # Same products as x*c-y*s, x*s+y*c, so results match scalar code
+    out = rm[:,None,:,0]*pl[None,:,0,None] + rm[:,None,:,1]*pl[None,:,1,None]
+    return out if np.ndim(ra) else out[0]
 
-    '''
-    cyl = cylinder(h=gthick*1.1, d=holeDiam, center=True)
+def makeTooth(nT=12, gmodule=3, pressAngle=28, nradii=6):
+    '''Return (repo, pang): an m x 2 array of points outlining one tooth
+    of a spur gear with nT teeth, module=gmodule, pressure
+    angle=pressAngle (degrees), running from gap center to gap center;
+    and pang, the angle (radians) from one tooth to the next.  The
+    tooth has nradii involute points per side plus a few points of
+    curve-rounding in the gap.  See spurGear for parameter details.  '''
     nTeeth  = float(nT)
     gmodule = float(gmodule)
     pitchDiam = gmodule * nTeeth
@@ -52,18 +55,11 @@ def spurGear(nT=12, gmodule=3, holeDiam=6.35, gthick=4, pressAngle=28):
     rm = max(rb, rr)
     #print ('rp {:8.2f}   rb {:8.2f}   rr {:8.2f}  rt {:8.2f}'.format(rp, rb, rr, rt)) 
 
-    def round3(v):  return int(1000*v+0.5)/1000.0
-    def rotated(pl, ra):
-        '''Return point list pl, rotated by ra radians, rounded
-        to a few decimal places for compactness.  '''
-        s, c = sin(ra), cos(ra)
-        return [[round3(x*c-y*s), round3(x*s+y*c)] for x,y in pl]
-
-    def invo(r): # Compute involute at radius r, return its (x,y)
-        ia = sqrt((r/rb)**2 - 1) # Radians for involute to reach radius r
-        ix = rb*(cos(ia) + ia*sin(ia))
-        iy = rb*(sin(ia) - ia*cos(ia)) # x,y coords of point on involute 
-        return (ix,-iy)
+    def invo(r): # Compute involute at radii r, return its x,y arrays
+        ia = np.sqrt((r/rb)**2 - 1) # Radians for involute to reach radius r
+        ix = rb*(np.cos(ia) + ia*np.sin(ia))
+        iy = rb*(np.sin(ia) - ia*np.cos(ia)) # x,y coords of points on involute 
+        return ix, -iy
 
     # Make set of points for outline of one tooth along +y axis
     # Compute point at pitch radius, for use as alignment angle  
@@ -72,9 +68,8 @@ def spurGear(nT=12, gmodule=3, holeDiam=6.35, gthick=4, pressAngle=28):
     tang = pi/nTeeth          # angle subtended by one tooth or one gap at rp
     htan = tang/2             # half-tooth angle: 1/4 of pitch angle
     pang = 2*tang             # angle subtended by one tooth + one gap
-    nradii = 6
     rstep = (rt-rm)/float(nradii)
-    points = [invo(rm + j*rstep) for j in range(nradii)]
+    points = np.column_stack(invo(rm + rstep*np.arange(nradii)))
     
     # Rotate half-tooth for proper tooth thickness at pitch circle
     points = rotated(points, alan+htan)
@@ -85,24 +80,105 @@ def spurGear(nT=12, gmodule=3, holeDiam=6.35, gthick=4, pressAngle=28):
     if g>0:                 # Add 3 points like on an arc
         curve = [[rr,0],[rr+u,-u*6],[rr+u*3,-u*8]]
         # Skip first point if it's behind the curve
-        points = rotated(curve,tang) + points[0 if x>rr+u*3 else 1:]
+        points = np.concatenate((rotated(curve,tang), points[0 if x>rr+u*3 else 1:]))
     #print ('Half-tooth points after curver: ',points)
     # Mirror tooth top side to bottom (except for center pt of gap)
-    bepo = points + [[x,-y] for x,y in reversed(points[1:])]
-    repo = list(reversed(bepo))   # draw up not down
-    polyli = []
-    for i in range(nT):
-        polyli +=  rotated(repo, i*pang)
-    return linear_extrude(gthick, True)(polygon(polyli)) - cyl
+    bepo = np.concatenate((points, points[:0:-1]*(1,-1)))
+    repo = bepo[::-1]         # draw up not down
+    return repo, pang
+
+def makeProfile(nT=12, gmodule=3, pressAngle=28, nradii=6):
+    '''Return an (m*nT) x 2 array of points outlining a spur gear, made
+    by rotating the makeTooth outline into all nT positions in one
+    shot.  Parameters are as for makeTooth.  '''
+    repo, pang = makeTooth(nT, gmodule, pressAngle, nradii)
+    return rotated(repo, pang*np.arange(nT)).reshape(-1, 2)
+
+def toothWedge(nT=12, gmodule=3, pressAngle=28, nradii=6):
+    '''Return the makeTooth outline closed into a wedge via the gap
+    center on its far side and the gear center.  nT such wedges,
+    rotated by multiples of 360/nT degrees, union to the full gear
+    outline.  '''
+    repo, pang = makeTooth(nT, gmodule, pressAngle, nradii)
+    return np.concatenate((repo[-1:]*(1,-1), repo, [[0.,0.]]))
+
+@lru_cache(maxsize=128)
+def _cachedProfile(nT, gmodule, pressAngle, nradii):
+    prof = makeProfile(nT, gmodule, pressAngle, nradii)
+    prof.flags.writeable = False   # Shared by all callers; keep it intact
+    return prof
+
+def gearProfile(nT=12, gmodule=3, pressAngle=28, nradii=6):
+    '''Return the gear outline computed by makeProfile, via a bounded
+    LRU cache keyed on (nT, gmodule, pressAngle, nradii).  Hole
+    diameter and thickness don't affect the 2D outline, so sweeps
+    over them, and assemblies with several identical gears, reuse one
+    computed outline.  The returned array is read-only.  '''
+    return _cachedProfile(int(nT), float(gmodule), float(pressAngle), int(nradii))
+
+def gearOutline(nT=12, gmodule=3, pressAngle=28, nradii=6):
+    '''Return the gearProfile outline as an outline.Outline of nT parts,
+    one per tooth, sharing the cached array.  '''
+    from outline import Outline
+    return Outline(gearProfile(nT, gmodule, pressAngle, nradii), int(nT))
+
+def profileCacheInfo():
+    '''Return (hits, misses, maxsize, currsize) of the outline cache.'''
+    return _cachedProfile.cache_info()
+
+def clearProfileCache():
+    '''Empty the outline cache and reset its hit/miss counters.'''
+    _cachedProfile.cache_clear()
+
+def spurGear(nT=12, gmodule=3, holeDiam=6.35, gthick=4, pressAngle=28,
+             instanced=False, lod=None):
+    '''Return CSG of a cylindrical spur gear having center-hole
+    diameter=holeDiam, thickness=gthick, module=gmodule, pressure
+    angle=pressAngle, #teeth=nT.  If instanced is true, the outline is
+    emitted as one tooth, in an OpenSCAD module, rotated into place by
+    a for loop; else as one polygon listing every point of every
+    tooth.  lod, if not None, is a gearcore.LOD setting the number of
+    involute points per tooth side and of center-hole facets.  In more
+    detail:
+
+    module: A metric gear's module (mm) is its reference diameter (its
+    pitch diameter) divided by its tooth count.  For example, a
+    module-3 gear with 30 teeth is 90 mm across.  "Circular pitch",
+    equal to pi*module, is tooth-to-tooth circumferential distance at
+    pitch diameter.  "Diametral pitch" is the number of tooth
+    intervals per inch at pitch diameter.
+
+    Pressure angle (degrees) is profile angle at pitch diameter; also
+    equals angle between normal to tooth surface and angle of force
+    when gear contact point is at the pitch diameter.
+
+    Coefficient of profile shift: [Not in this version; may add in
+    future] Use 0 if #teeth is large; as #teeth gets smaller, use a
+    larger shift to avoid tooth undercutting.  See Table 4, p. T-40 in
+    SDP-SI 8050T034.pdf
+
+    '''
+    from solid import linear_extrude, cylinder
+    nradii = lod.nradii if lod else 6
+    cyl = cylinder(h=gthick*1.1, d=holeDiam, center=True,
+                   segments=lod.fn(holeDiam) if lod else None)
+    if instanced:
+        from scadtools import ringOf
+        from outline import Outline
+        wedge = Outline(toothWedge(nT, gmodule, pressAngle, nradii)).polygon()
+        return linear_extrude(gthick, True)(ringOf(wedge, nT, prefix='tooth')) - cyl
+    outline = gearOutline(nT, gmodule, pressAngle, nradii)
+    return linear_extrude(gthick, True)(outline.polygon()) - cyl
 
 #---------------------------------------------
 if __name__ == '__main__':
     from sys import argv
+    from scadwriter import writeScad
     arn = 0
     arn+=1; nT  = int(argv[arn]) if len(argv)>arn else 20
     arn+=1; gM  = float(argv[arn]) if len(argv)>arn else 3.0
     arn+=1; hD  = float(argv[arn]) if len(argv)>arn else 3.175
     print ('Making spurGear(nT:{}, gM:{}, hD:{})'.format(nT,gM,hD))
     g = spurGear(nT, gM, hD)
-    scad_render_to_file(g, 'tooth.scad', include_orig_code=False)
+    writeScad('tooth.scad', g)
     #print ('Wrote scads to tooth.scad')